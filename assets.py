@@ -0,0 +1,178 @@
+import threading
+from collections import OrderedDict
+
+import pygame
+
+# ASSET MANAGER
+# every image goes through here so each file is decoded and converted to the display's pixel format
+# once, however many places use it; scaled copies are assets too, keyed by their size
+# things that keep an image around (rooms, battles, the menus) acquire it and release it when done;
+# once the decoded surfaces go over the memory budget, assets nobody holds are dropped, least
+# recently used first, and simply loaded again if they're wanted later
+# a full-size image that was only loaded to make a scaled copy is dropped as soon as the copy exists
+# preload() decodes files on a background thread ahead of time (startup only decodes what the main
+# menu needs); asking for a file that hasn't arrived yet just waits for it, or loads it on the spot
+# if the thread hasn't got to it; converting to the display format always happens on the main thread
+# preloaded surfaces count towards the budget too: the loader pauses while the budget is used up, and
+# finishes the file it's on, so it can go over by at most that one file
+MEMORY_BUDGET = 64 * 1024 * 1024 # bytes of decoded surfaces
+
+
+def surface_bytes(surface):
+    return surface.get_bytesize() * surface.get_width() * surface.get_height()
+
+
+class AssetManager:
+    def __init__(self, budget_bytes=MEMORY_BUDGET):
+        self.budget_bytes = budget_bytes
+        self.surfaces = OrderedDict() # (path, alpha, size) -> surface, least recently used first
+        self.refcounts = {} # (path, alpha, size) -> users holding it
+        self.total_bytes = 0
+        self.loads = 0 # files decoded from disk
+        self.evictions = 0
+
+        # background loading
+        self.lock = threading.Lock()
+        self.arrived = threading.Condition(self.lock) # notified whenever the loader finishes a file
+        self.queued = [] # paths waiting for the loader thread
+        self.loading = None # path the loader thread is decoding right now
+        self.decoded = {} # path -> surface (or the error) from the loader, not converted yet
+        self.decoded_bytes = 0 # size of the surfaces in self.decoded
+        self.requested = set() # paths already decoded or being decoded, so preload skips them
+        self.preload_total = 0
+        self.preload_done = 0
+        self.loader = None
+
+    def get(self, path, alpha=False, size=None):
+        # the shared surface for path (scaled to size if given), without holding on to it
+        # alpha keeps per-pixel transparency (convert_alpha), otherwise it's an opaque convert
+        key = (path, alpha, size)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)
+            return surface
+        if size is None:
+            surface = self.decode(path)
+            if pygame.display.get_surface() is not None: # convert needs a window
+                surface = surface.convert_alpha() if alpha else surface.convert()
+        else:
+            base_key = (path, alpha, None)
+            base_cached = base_key in self.surfaces
+            surface = pygame.transform.scale(self.get(path, alpha), size)
+            if not base_cached and base_key not in self.refcounts:
+                # the full-size image was only loaded to make this copy, so don't keep it around
+                self.total_bytes -= surface_bytes(self.surfaces.pop(base_key))
+        self.surfaces[key] = surface
+        self.total_bytes += surface_bytes(surface)
+        self.evict(keep=key) # never the one being handed back
+        return surface
+
+    def decode(self, path):
+        # the file's pixels, from the loader thread if it has (or is about to have) them
+        with self.lock:
+            while self.loading == path:
+                self.arrived.wait()
+            if path in self.decoded:
+                surface = self.decoded.pop(path)
+                if isinstance(surface, Exception):
+                    raise surface
+                self.decoded_bytes -= surface_bytes(surface)
+                self.arrived.notify_all() # the loader may be waiting for room
+                return surface
+            if path in self.queued:
+                # needed now, don't wait for the loader to get round to it
+                self.queued.remove(path)
+                self.preload_done += 1
+            self.requested.add(path)
+        self.loads += 1
+        return pygame.image.load(path)
+
+    def preload(self, paths):
+        # queues files to be decoded in the background, in order
+        with self.lock:
+            for path in paths:
+                if path not in self.requested:
+                    self.requested.add(path)
+                    self.queued.append(path)
+                    self.preload_total += 1
+        if self.loader is None or not self.loader.is_alive():
+            self.loader = threading.Thread(target=self.load_queued, daemon=True)
+            self.loader.start()
+
+    def load_queued(self):
+        while True:
+            with self.lock:
+                # wait for room in the budget (the main thread notifies when it frees some)
+                while self.queued and self.over_budget():
+                    self.arrived.wait(0.5)
+                if not self.queued:
+                    return
+                path = self.queued.pop(0)
+                self.loading = path
+            try:
+                surface = pygame.image.load(path)
+            except (pygame.error, OSError) as e:
+                surface = e # raised when the file is asked for
+            with self.lock:
+                self.decoded[path] = surface
+                if not isinstance(surface, Exception):
+                    self.decoded_bytes += surface_bytes(surface)
+                self.loads += 1
+                self.loading = None
+                self.preload_done += 1
+                self.arrived.notify_all()
+
+    def progress(self):
+        # fraction of the preloaded files that have arrived, 1.0 once they all have
+        with self.lock:
+            if self.preload_total == 0:
+                return 1.0
+            return self.preload_done / self.preload_total
+
+    def acquire(self, path, alpha=False, size=None):
+        # held before it's loaded, so loading other things can't evict it
+        key = (path, alpha, size)
+        self.refcounts[key] = self.refcounts.get(key, 0) + 1
+        try:
+            return self.get(path, alpha, size)
+        except Exception:
+            self.release(path, alpha, size)
+            raise
+
+    def release(self, path, alpha=False, size=None):
+        key = (path, alpha, size)
+        if self.refcounts.get(key, 0) <= 1:
+            self.refcounts.pop(key, None)
+        else:
+            self.refcounts[key] -= 1
+        self.evict()
+
+    def over_budget(self):
+        # converted assets plus preloaded ones still waiting to be converted
+        return self.total_bytes + self.decoded_bytes > self.budget_bytes
+
+    def evict(self, keep=None):
+        # drops unheld assets until back under budget (held ones can push it over)
+        if not self.over_budget():
+            return
+        for key in list(self.surfaces):
+            if not self.over_budget():
+                break
+            if key not in self.refcounts and key != keep:
+                self.total_bytes -= surface_bytes(self.surfaces.pop(key))
+                self.evictions += 1
+        with self.lock:
+            self.arrived.notify_all() # the loader may be waiting for room
+
+    def asset_bytes(self, path, alpha=False, size=None):
+        # decoded size of one asset, 0 if it isn't loaded
+        surface = self.surfaces.get((path, alpha, size))
+        return surface_bytes(surface) if surface is not None else 0
+
+    def report(self):
+        # (path, alpha, size, bytes, users) for every loaded asset, biggest first
+        rows = [key + (surface_bytes(surface), self.refcounts.get(key, 0)) for key, surface in self.surfaces.items()]
+        return sorted(rows, key=lambda row: row[3], reverse=True)
+
+
+assets = AssetManager()
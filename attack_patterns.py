@@ -0,0 +1,108 @@
+import math
+
+from game_clock import TICK_MS, per_tick
+from rasterize import np
+
+# ATTACK PATTERNS
+# enemy attacks described as data; spawn_pattern turns one into a wave of BulletArrays bullets whose
+# whole flight is fixed when the wave is fired (a formula, or a path sampled once per tick), so adding
+# a denser pattern doesn't add any per-bullet work to Battle.update
+# speeds are pixels per second, intervals and lifetimes are ms, angles are radians (spin per tick)
+#   spread       - bullets falling straight down from random points along the top of the box
+#   ring         - a ring of bullets flying outwards from one point
+#   spiral       - arms of bullets fired one after another from the centre, turning as they go
+#   homing_burst - a staggered burst that curves in to where the heart was when it was fired
+ATTACK_PATTERNS = {
+    "spread": {"shape": "spread", "count": (3, 5), "speed": (120, 240)},
+    "ring": {"shape": "ring", "count": 14, "speed": 90},
+    "spiral": {"shape": "spiral", "arms": 3, "shots": 10, "interval": 90, "speed": 75,
+               "turn": 0.3, "spin": 0.01},
+    "homing_burst": {"shape": "homing_burst", "count": 5, "interval": 120, "speed": 150, "curve": 160},
+}
+
+BULLET_LIFETIME = 3000
+
+
+def spawn_spread(bullets, pattern, now, box, target, rng):
+    box_x, box_y, box_width, box_height = box
+    for _ in range(rng.randint(*pattern["count"])):
+        # spawn bullets at top of battle box (not screen top)
+        x = rng.randint(box_x + 20, box_x + box_width - 20)
+        bullets.spawn(x, box_y - 30, 0, per_tick(rng.uniform(*pattern["speed"])), now, BULLET_LIFETIME)
+
+
+def spawn_ring(bullets, pattern, now, box, target, rng):
+    box_x, box_y, box_width, box_height = box
+    centre_x = rng.randint(box_x + 20, box_x + box_width - 20)
+    centre_y = box_y - 60
+    count = pattern["count"]
+    offset = rng.uniform(0, 2 * math.pi / count) # so rings don't always leave the same gaps
+    for i in range(count):
+        bullets.spawn(centre_x, centre_y, 0, 0, now, BULLET_LIFETIME,
+                      radial=per_tick(pattern["speed"]), angle=offset + 2 * math.pi * i / count)
+
+
+def spawn_spiral(bullets, pattern, now, box, target, rng):
+    box_x, box_y, box_width, box_height = box
+    centre_x = box_x + box_width // 2 - 10
+    centre_y = box_y - 60
+    start = rng.uniform(0, 2 * math.pi)
+    direction = rng.choice((-1, 1))
+    arms = pattern["arms"]
+    for shot in range(pattern["shots"]):
+        for arm in range(arms):
+            angle = start + direction * (2 * math.pi * arm / arms + pattern["turn"] * shot)
+            bullets.spawn(centre_x, centre_y, 0, 0, now + shot * pattern["interval"], BULLET_LIFETIME,
+                          radial=per_tick(pattern["speed"]), angle=angle, spin=direction * pattern["spin"])
+
+
+def curve_samples(start, end, bend, speed, lifetime):
+    # one position per tick along a curve from start to end (bent sideways by bend pixels),
+    # then straight on past end the way it was going
+    start_x, start_y = start
+    end_x, end_y = end
+    chord_x = end_x - start_x
+    chord_y = end_y - start_y
+    chord = math.hypot(chord_x, chord_y) or 1.0
+    control_x = (start_x + end_x) / 2 - chord_y / chord * bend
+    control_y = (start_y + end_y) / 2 + chord_x / chord * bend
+
+    ticks = np.arange(int(lifetime / TICK_MS) + 1, dtype=np.float64)
+    arrive = max(1.0, math.ceil(math.hypot(chord, bend) / speed))
+    u = np.minimum(ticks / arrive, 1.0)
+    xs = (1 - u) ** 2 * start_x + 2 * (1 - u) * u * control_x + u ** 2 * end_x
+    ys = (1 - u) ** 2 * start_y + 2 * (1 - u) * u * control_y + u ** 2 * end_y
+
+    # carry on along the curve's last direction once it gets to end
+    out_x = end_x - control_x
+    out_y = end_y - control_y
+    out = math.hypot(out_x, out_y) or 1.0
+    past = np.maximum(ticks - arrive, 0.0) * speed
+    return xs + out_x / out * past, ys + out_y / out * past
+
+
+def spawn_homing_burst(bullets, pattern, now, box, target, rng):
+    box_x, box_y, box_width, box_height = box
+    start = (rng.randint(box_x, box_x + box_width - 20), box_y - 80)
+    for i in range(pattern["count"]):
+        # alternate sides and bend less each shot, so the burst fans in on the heart
+        bend = pattern["curve"] * (1 - i / pattern["count"]) * (1 if i % 2 else -1)
+        samples = curve_samples(start, target, bend, per_tick(pattern["speed"]), BULLET_LIFETIME)
+        bullets.spawn(start[0], start[1], 0, 0, now + i * pattern["interval"], BULLET_LIFETIME, samples=samples)
+
+
+PATTERN_SHAPES = {
+    "spread": spawn_spread,
+    "ring": spawn_ring,
+    "spiral": spawn_spiral,
+    "homing_burst": spawn_homing_burst,
+}
+
+
+def spawn_pattern(bullets, name, now, box, target, rng):
+    # fires the named pattern into a BulletArrays
+    # box is the dodging box (x, y, width, height), target the heart's top left, rng e.g. the random module
+    if name not in ATTACK_PATTERNS:
+        raise ValueError(f"Unknown attack pattern: {name}")
+    pattern = ATTACK_PATTERNS[name]
+    PATTERN_SHAPES[pattern["shape"]](bullets, pattern, now, box, target, rng)
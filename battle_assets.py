@@ -0,0 +1,55 @@
+import pygame
+
+from assets import assets
+from text_cache import text_cache
+
+# BATTLE ASSETS
+# everything Battle.draw puts on screen that comes from an image or a fixed design is prepared here
+# at the size it's drawn at, so drawing a battle frame never scales anything
+# portraits and the butterknife are scaled copies held through the asset manager (and shared by
+# every encounter while they stay loaded); option buttons are built once per process per look
+PORTRAIT_SIZE = (150, 150)
+ITEM_SIZE = (100, 100)
+BUTTON_SIZE = (300, 100)
+
+buttons = {} # (text, text colour, border colour) -> finished button surface
+
+
+def get_button(text, text_color, border_color):
+    # black rounded button with a border and centred text, corners left transparent
+    key = (text, tuple(text_color), tuple(border_color))
+    button = buttons.get(key)
+    if button is None:
+        width, height = BUTTON_SIZE
+        button = pygame.Surface(BUTTON_SIZE, pygame.SRCALPHA)
+        pygame.draw.rect(button, (0, 0, 0), (0, 0, width, height), border_radius=20)
+        pygame.draw.rect(button, border_color, (0, 0, width, height), 5, border_radius=20)
+        label = text_cache.render(text, 75, text_color)
+        button.blit(label, label.get_rect(center=(width // 2, height // 2)))
+        buttons[key] = button
+    return button
+
+
+class BattleAssets:
+    def __init__(self):
+        self.held = [] # (path, alpha, size) acquired from the asset manager
+        self.player_portrait = self.acquire("cow_battle.png", PORTRAIT_SIZE)
+        self.enemy_portrait = self.acquire("carrot_battle.png", PORTRAIT_SIZE)
+
+        try:
+            self.butterknife = self.acquire("butterknife.PNG", ITEM_SIZE)
+        except pygame.error as e:
+            print(f"ERROR: Could not load butterknife image: {e}")
+            self.butterknife = pygame.Surface(ITEM_SIZE)
+            self.butterknife.fill((255, 0, 0))
+            print("Created placeholder surafce instead")
+
+    def acquire(self, path, size):
+        surface = assets.acquire(path, alpha=True, size=size)
+        self.held.append((path, True, size))
+        return surface
+
+    def release(self):
+        for path, alpha, size in self.held:
+            assets.release(path, alpha, size)
+        self.held = []
@@ -0,0 +1,51 @@
+# BULLET DRAWING BENCHMARK
+# draws N bullets the old way (one pygame.draw.rect each) and with BulletSprites (one Surface.blits
+# for the lot), plus rotated sprites, for a sweep of bullet counts
+# run from the project folder:  python benchmarks/bench_bullet_draw.py
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy") # no window needed
+
+import pygame
+
+from bullet_render import BulletSprites
+
+WHITE = (255, 255, 255)
+
+
+def best_time(function, repeats=5):
+    best = None
+    for _ in range(repeats):
+        start_time = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start_time
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    pygame.init()
+    screen = pygame.display.set_mode((1300, 720))
+    sprites = BulletSprites()
+
+    print(f"{'bullets':<10}{'draw.rect ms':>14}{'blits ms':>12}{'rotated ms':>12}")
+    for count in (100, 1000, 5000, 20000):
+        rng = random.Random(count)
+        positions = [(rng.randint(0, 1280), rng.randint(0, 700)) for _ in range(count)]
+
+        def draw_rects():
+            for x, y in positions:
+                pygame.draw.rect(screen, WHITE, (x, y, 20, 20))
+
+        rect_time = best_time(draw_rects)
+        blits_time = best_time(lambda: sprites.draw(screen, positions, 20, 20, WHITE))
+        rotated_time = best_time(lambda: sprites.draw(screen, positions, 20, 20, WHITE, angle=45))
+        print(f"{count:<10}{rect_time * 1e3:>14.3f}{blits_time * 1e3:>12.3f}{rotated_time * 1e3:>12.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+# BULLET BENCHMARK
+# one tick of falling "spread" bullets: a list of objects updated and hit-tested one at a time
+# (the way Battle.update does it for Bullet) against BulletArrays doing the whole wave at once
+# run from the project folder:  python benchmarks/bench_bullets.py  (needs numpy)
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pygame
+
+from bullet_arrays import BulletArrays
+from rasterize import HAS_NUMPY
+
+
+# same fields and per-tick work as a "simple" mode Bullet, without needing the game window
+class FallingBullet:
+    def __init__(self, x, y, speed_y, now):
+        self.x = x
+        self.y = y
+        self.speed_y = speed_y
+        self.width = 20
+        self.height = 20
+        self.creation_time = now
+        self.lifetime = 3000
+
+    def update(self, now):
+        if now - self.creation_time > self.lifetime:
+            return "expired"
+        self.y += self.speed_y
+        return "alive"
+
+    def check_collision(self, target_rect):
+        return pygame.Rect(self.x, self.y, self.width, self.height).colliderect(target_rect)
+
+
+def spawn_wave(count, seed):
+    rng = random.Random(seed)
+    return [(rng.randint(0, 1300), rng.randint(-720, 0), rng.uniform(4, 8)) for _ in range(count)]
+
+
+def time_objects(wave, target_rect, ticks):
+    bullets = [FallingBullet(x, y, speed_y, 0) for x, y, speed_y in wave]
+    start_time = time.perf_counter()
+    for tick in range(ticks):
+        for bullet in bullets[:]:
+            status = bullet.update(tick * 16)
+            if bullet.check_collision(target_rect) or status == "expired":
+                bullets.remove(bullet)
+    return (time.perf_counter() - start_time) / ticks * 1e3
+
+
+def time_arrays(wave, target_rect, ticks):
+    bullets = BulletArrays()
+    for x, y, speed_y in wave:
+        bullets.spawn(x, y, 0, speed_y, 0)
+    start_time = time.perf_counter()
+    for tick in range(ticks):
+        bullets.update(tick * 16, target_rect)
+    return (time.perf_counter() - start_time) / ticks * 1e3
+
+
+def main():
+    if not HAS_NUMPY:
+        print("numpy isn't installed, nothing to compare")
+        return
+
+    target_rect = pygame.Rect(640, 400, 20, 20)
+    print(f"{'bullets':<10}{'objects ms':>12}{'arrays ms':>12}")
+    for count in (100, 1000, 5000, 20000):
+        wave = spawn_wave(count, seed=count)
+        print(f"{count:<10}{time_objects(wave, target_rect, 60):>12.3f}{time_arrays(wave, target_rect, 60):>12.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+# COLLISION BENCHMARK
+# one player-sized collision query against the obstacles: checking every rect, the grid hash
+# in spatial.py, and the numpy pixel mask (if numpy is installed)
+# run from the project folder:  python benchmarks/bench_collision.py
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rasterize import HAS_NUMPY, CollisionMask
+from room_layouts import ROOM_OBSTACLES
+from spatial import StaticGridIndex, rects_overlap
+
+
+def random_obstacles(count, seed):
+    rng = random.Random(seed)
+    return [(rng.randint(0, 1300), rng.randint(0, 720), rng.randint(5, 120), rng.randint(5, 120))
+            for _ in range(count)]
+
+
+def linear_collides(obstacles, x, y, w, h):
+    for obstacle in obstacles:
+        if rects_overlap(x, y, w, h, *obstacle):
+            return True
+    return False
+
+
+def time_queries(function, queries):
+    start_time = time.perf_counter()
+    for query in queries:
+        function(*query)
+    return (time.perf_counter() - start_time) / len(queries) * 1e6
+
+
+def main():
+    rng = random.Random(0)
+    queries = [(rng.randint(-50, 1300), rng.randint(-50, 720), 64, 64) for _ in range(2000)]
+
+    print(f"{'obstacles':<12}{'linear us':>12}{'grid us':>12}{'mask us':>12}")
+    cases = [("room1", ROOM_OBSTACLES["room1"])] + \
+            [(str(count), random_obstacles(count, seed=count)) for count in (100, 1000, 5000)]
+    for name, obstacles in cases:
+        index = StaticGridIndex(obstacles)
+        for query in queries:
+            if index.collides(*query) != linear_collides(obstacles, *query):
+                raise AssertionError(f"{name} obstacles: grid index disagrees at {query}")
+        linear_time = time_queries(lambda *query: linear_collides(obstacles, *query), queries)
+        grid_time = time_queries(index.collides, queries)
+        mask_time = float("nan")
+        if HAS_NUMPY:
+            mask = CollisionMask(obstacles, 1300, 720)
+            mask_time = time_queries(mask.collides, queries)
+        print(f"{name:<12}{linear_time:>12.2f}{grid_time:>12.2f}{mask_time:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
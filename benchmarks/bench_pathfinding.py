@@ -0,0 +1,177 @@
+# PATHFINDING BENCHMARK
+# compares the original astar_pathfinding with astar_flat on the game rooms and on big random grids
+# run from the project folder:  python benchmarks/bench_pathfinding.py
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dstar_lite import DStarLite
+from hierarchical import WorldGraph, get_cluster_graph
+from path_strategies import PATH_STRATEGIES
+from pathfinding import FlatGrid, astar_flat, astar_pathfinding, build_grid
+from room_layouts import ROOM_LINKS, ROOM_OBSTACLES
+
+
+def random_grid(width, height, wall_chance, seed):
+    rng = random.Random(seed)
+    return [[1 if rng.random() < wall_chance else 0 for _ in range(width)] for _ in range(height)]
+
+
+def random_queries(grid, count, seed):
+    # picks start/goal pairs on open tiles
+    rng = random.Random(seed)
+    open_tiles = [(x, y) for y, row in enumerate(grid) for x, value in enumerate(row) if value == 0]
+    return [(rng.choice(open_tiles), rng.choice(open_tiles)) for _ in range(count)]
+
+
+def time_queries(search, grid, queries, repeats):
+    best = None
+    for _ in range(repeats):
+        start_time = time.perf_counter()
+        for start, goal in queries:
+            search(grid, start, goal)
+        elapsed = time.perf_counter() - start_time
+        best = elapsed if best is None else min(best, elapsed)
+    return best / len(queries)
+
+
+def compare(name, grid, queries, repeats):
+    flat_grid = FlatGrid.from_rows(grid)
+
+    # both engines must agree before their speed means anything
+    for start, goal in queries:
+        if astar_pathfinding(grid, start, goal) != astar_flat(flat_grid, start, goal):
+            raise AssertionError(f"{name}: paths differ for {start} -> {goal}")
+
+    old_time = time_queries(astar_pathfinding, grid, queries, repeats)
+    new_time = time_queries(astar_flat, flat_grid, queries, repeats)
+    print(f"{name:<24}{old_time * 1e6:>12.1f}{new_time * 1e6:>12.1f}{old_time / new_time:>9.2f}x")
+
+
+def compare_strategies(name, grid, queries):
+    # average expanded nodes, waypoints and time per query for each path strategy
+    for strategy in PATH_STRATEGIES.values():
+        flat_grid = FlatGrid.from_rows(grid)  # fresh grid so Theta* starts with an empty sight cache
+        expansions = 0
+        waypoints = 0
+        start_time = time.perf_counter()
+        for start, goal in queries:
+            stats = {}
+            waypoints += len(strategy.find_path(flat_grid, start, goal, stats=stats))
+            expansions += stats.get("expansions", 0)
+        elapsed = time.perf_counter() - start_time
+        print(f"{name:<24}{strategy.name:<8}{expansions / len(queries):>12.1f}"
+              f"{waypoints / len(queries):>12.1f}{elapsed / len(queries) * 1e6:>12.1f}")
+
+
+def compare_hierarchical(size, cluster_size):
+    # corner to corner and random trips on a big map; the first pass pays for searching the
+    # clusters it goes through, later passes reuse them
+    grid = random_grid(size, size, 0.2, seed=size)
+    grid[0][0] = 0
+    grid[size - 1][size - 1] = 0
+    flat_grid = FlatGrid.from_rows(grid)
+
+    start_time = time.perf_counter()
+    graph = get_cluster_graph(flat_grid, cluster_size)
+    build_time = time.perf_counter() - start_time
+
+    queries = [((0, 0), (size - 1, size - 1))] + random_queries(grid, 10, seed=5)
+    flat_time = time_queries(astar_flat, flat_grid, queries, repeats=1)
+    search = lambda grid, start, goal: graph.find_path(start, goal)
+    first_time = time_queries(search, flat_grid, queries, repeats=1)
+    warm_time = time_queries(search, flat_grid, queries, repeats=3)
+    print(f"{f'random {size}x{size}':<24}{build_time * 1e3:>12.1f}{flat_time * 1e6:>12.1f}"
+          f"{first_time * 1e6:>12.1f}{warm_time * 1e6:>12.1f}")
+
+
+def compare_chase(move_every, seeds=10, steps=60):
+    # a bullet chasing a heart that steps to a random neighbouring tile every move_every steps:
+    # one D* Lite kept up to date against a fresh astar_flat each step
+    dstar_expansions = astar_expansions = 0
+    dstar_time = astar_time = 0.0
+    for seed in range(seeds):
+        rng = random.Random(seed)
+        grid = random_grid(64, 64, 0.2, seed)
+        flat_grid = FlatGrid.from_rows(grid)
+        open_tiles = [(x, y) for y, row in enumerate(grid) for x, value in enumerate(row) if value == 0]
+        while True:
+            bullet, heart = rng.choice(open_tiles), rng.choice(open_tiles)
+            if abs(bullet[0] - heart[0]) + abs(bullet[1] - heart[1]) > 40 and astar_flat(flat_grid, bullet, heart):
+                break
+        planner = DStarLite(flat_grid, bullet, heart)
+        for step in range(steps):
+            if step % move_every == 0:
+                x, y = heart
+                moves = [(x + dx, y + dy) for dx, dy in ((1, 0), (-1, 0), (0, 1), (0, -1))
+                         if flat_grid.in_bounds(x + dx, y + dy) and not flat_grid.is_wall(x + dx, y + dy)]
+                if moves:
+                    heart = rng.choice(moves)
+            stats = {}
+            start_time = time.perf_counter()
+            path = astar_flat(flat_grid, bullet, heart, stats=stats)
+            astar_time += time.perf_counter() - start_time
+            astar_expansions += stats.get("expansions", 0)
+
+            start_time = time.perf_counter()
+            next_tile = planner.update(bullet, heart)
+            dstar_time += time.perf_counter() - start_time
+            if path and planner.distance() != len(path):
+                raise AssertionError(f"chase seed {seed}: D* Lite distance differs at step {step}")
+            if next_tile is None:
+                break
+            bullet = next_tile
+        dstar_expansions += planner.expansions
+    print(f"{f'heart moves every {move_every}':<24}{astar_expansions:>12}{dstar_expansions:>12}"
+          f"{dstar_expansions / astar_expansions:>12.2f}{dstar_time / astar_time:>12.2f}")
+
+
+def main():
+    print(f"{'grid':<24}{'old us':>12}{'flat us':>12}{'speedup':>10}")
+    for room_name, obstacles in ROOM_OBSTACLES.items():
+        grid = build_grid(obstacles)
+        compare(room_name, grid, random_queries(grid, 200, seed=1), repeats=5)
+
+    for size in (64, 128, 256):
+        grid = random_grid(size, size, 0.25, seed=size)
+        compare(f"random {size}x{size}", grid, random_queries(grid, 20, seed=2), repeats=3)
+
+    # unreachable goals are the worst case: the whole reachable area gets explored
+    grid = random_grid(128, 128, 0.25, seed=7)
+    grid[64][64] = 1
+    queries = [((0, y), (64, 64)) for y in range(0, 128, 16) if grid[y][0] == 0]
+    compare("unreachable 128x128", grid, queries, repeats=3)
+
+    print()
+    print(f"{'grid':<24}{'search':<8}{'expanded':>12}{'waypoints':>12}{'us':>12}")
+    for room_name, obstacles in ROOM_OBSTACLES.items():
+        grid = build_grid(obstacles)
+        compare_strategies(room_name, grid, random_queries(grid, 100, seed=3))
+    for size in (64, 128):
+        grid = random_grid(size, size, 0.0, seed=size)  # open arena
+        compare_strategies(f"open {size}x{size}", grid, random_queries(grid, 20, seed=4))
+        grid = random_grid(size, size, 0.1, seed=size)
+        compare_strategies(f"sparse {size}x{size}", grid, random_queries(grid, 20, seed=4))
+
+    print()
+    print(f"{'grid':<24}{'build ms':>12}{'A* us':>12}{'HPA* 1st us':>12}{'HPA* us':>12}")
+    for size in (128, 256, 512):
+        compare_hierarchical(size, cluster_size=16)
+
+    world = WorldGraph({name: FlatGrid.from_rows(build_grid(obstacles))
+                        for name, obstacles in ROOM_OBSTACLES.items()}, ROOM_LINKS)
+    start_time = time.perf_counter()
+    route = world.find_route("room1", (5, 12), "room3", (20, 10))
+    print(f"room1 -> room3 route: {len(route)} steps in {(time.perf_counter() - start_time) * 1e6:.1f} us")
+
+    print()
+    print(f"{'chase 64x64':<24}{'A* exp':>12}{'D* exp':>12}{'exp ratio':>12}{'time ratio':>12}")
+    for move_every in (1, 2, 3, 5):
+        compare_chase(move_every)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+# RASTERIZE BENCHMARK
+# plain Python build_grid against the numpy version for smaller tiles and more obstacles
+# run from the project folder:  python benchmarks/bench_rasterize.py  (needs numpy)
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pathfinding import build_grid
+from rasterize import HAS_NUMPY, CollisionMask, rasterize_tiles
+from room_layouts import ROOM_OBSTACLES
+
+
+def random_obstacles(count, seed):
+    rng = random.Random(seed)
+    return [(rng.randint(0, 1300), rng.randint(0, 720), rng.randint(5, 120), rng.randint(5, 120))
+            for _ in range(count)]
+
+
+def best_time(function, repeats=3):
+    best = None
+    for _ in range(repeats):
+        start_time = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start_time
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    if not HAS_NUMPY:
+        print("numpy isn't installed, nothing to compare")
+        return
+
+    print(f"{'obstacles':<12}{'tile':>6}{'python ms':>12}{'numpy ms':>12}{'mask ms':>12}")
+    cases = [("room1", ROOM_OBSTACLES["room1"])] + \
+            [(str(count), random_obstacles(count, seed=count)) for count in (100, 1000, 5000)]
+    for name, obstacles in cases:
+        for tile_size in (40, 10, 4):
+            width = 1300 // tile_size
+            height = 720 // tile_size
+            if build_grid(obstacles, width, height, tile_size) != \
+                    rasterize_tiles(obstacles, width, height, tile_size).astype(int).tolist():
+                raise AssertionError(f"{name} obstacles, tile {tile_size}: grids differ")
+            python_time = best_time(lambda: build_grid(obstacles, width, height, tile_size))
+            numpy_time = best_time(lambda: rasterize_tiles(obstacles, width, height, tile_size))
+            mask_time = best_time(lambda: CollisionMask(obstacles, 1300, 720))
+            print(f"{name:<12}{tile_size:>6}{python_time * 1e3:>12.2f}{numpy_time * 1e3:>12.2f}"
+                  f"{mask_time * 1e3:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+# BULLET ARRAYS
+# bullets on fixed trajectories (spread, ring, spiral, homing burst - see attack_patterns.py) kept as one
+# numpy array per field instead of one Bullet object each
+# every bullet's position is worked out from the time since it was fired, so a whole wave moves and
+# hit-tests in a few array ops and nothing is integrated frame by frame
+# bullets that follow paths still need per-bullet logic, so those stay as Bullet objects
+# numpy is optional: without it HAS_NUMPY is False and Battle keeps using Bullet objects for everything
+from game_clock import TICK_MS
+from rasterize import np
+
+# speeds are in pixels per tick (see game_clock.py), same units as Bullet.speed
+
+# per bullet fields and their types
+FIELDS = {
+    "born": np.float64, "lifetime": np.float64,  # ms; born can be in the future for staggered shots
+    "origin_x": np.float64, "origin_y": np.float64,  # top left when fired
+    "vx": np.float64, "vy": np.float64,  # straight line part, pixels per ms
+    "radial": np.float64, "angle": np.float64, "spin": np.float64,  # outward speed (px/ms), radians, radians/ms
+    "table_start": np.int64, "table_length": np.int64,  # pre-sampled path, length 0 if the bullet has none
+    "x": np.float64, "y": np.float64,  # where update() last put it
+} if np is not None else {}
+
+
+class BulletArrays:
+    def __init__(self, capacity=256, width=20, height=20):
+        self.width = width # every array bullet is the same size
+        self.height = height
+        self.count = 0 # bullets in use are the first count entries of each array
+        self.capacity = 0
+        self.allocate(capacity)
+        # pre-sampled paths, one position every TICK_MS, all in one pair of arrays
+        self.table_x = np.zeros(1024)
+        self.table_y = np.zeros(1024)
+        self.table_used = 0
+
+    def allocate(self, capacity):
+        # grows the arrays, keeping the bullets already in them
+        for name, dtype in FIELDS.items():
+            array = np.zeros(capacity, dtype=dtype)
+            if self.capacity:
+                array[:self.count] = getattr(self, name)[:self.count]
+            setattr(self, name, array)
+        self.capacity = capacity
+
+    def __len__(self):
+        return self.count
+
+    def spawn(self, x, y, vx, vy, now, lifetime=3000, radial=0, angle=0, spin=0, samples=None):
+        # x, y: top left at time now, vx/vy/radial in pixels per tick, spin in radians per tick
+        # samples: optional (xs, ys) path sampled once per tick, followed instead of the formula
+        if self.count == self.capacity:
+            self.allocate(self.capacity * 2)
+        i = self.count
+        self.born[i] = now
+        self.lifetime[i] = lifetime
+        self.origin_x[i] = self.x[i] = x
+        self.origin_y[i] = self.y[i] = y
+        self.vx[i] = vx / TICK_MS
+        self.vy[i] = vy / TICK_MS
+        self.radial[i] = radial / TICK_MS
+        self.angle[i] = angle
+        self.spin[i] = spin / TICK_MS
+        self.table_start[i] = 0
+        self.table_length[i] = 0
+        if samples is not None:
+            self.table_start[i], self.table_length[i] = self.add_samples(*samples)
+        self.count += 1
+
+    def add_samples(self, xs, ys):
+        length = len(xs)
+        if self.table_used + length > len(self.table_x):
+            self.compact_tables(length)
+        start = self.table_used
+        self.table_x[start:start + length] = xs
+        self.table_y[start:start + length] = ys
+        self.table_used += length
+        return start, length
+
+    def compact_tables(self, extra):
+        # drops samples nobody uses any more, growing the table if that doesn't free enough
+        n = self.count
+        sampled = np.flatnonzero(self.table_length[:n])
+        needed = int(self.table_length[:n][sampled].sum()) + extra
+        size = len(self.table_x)
+        while size < needed * 2:
+            size *= 2
+        table_x = np.zeros(size)
+        table_y = np.zeros(size)
+        used = 0
+        for i in sampled.tolist():
+            start = self.table_start[i]
+            length = self.table_length[i]
+            table_x[used:used + length] = self.table_x[start:start + length]
+            table_y[used:used + length] = self.table_y[start:start + length]
+            self.table_start[i] = used
+            used += length
+        self.table_x = table_x
+        self.table_y = table_y
+        self.table_used = used
+
+    def evaluate(self, now):
+        # positions of every bullet at time now, in one pass over the arrays
+        # a bullet past its lifetime stays where it was when it ran out, like a Bullet that has expired
+        n = self.count
+        t = np.clip(now - self.born[:n], 0.0, self.lifetime[:n])
+        angle = self.angle[:n] + self.spin[:n] * t
+        distance = self.radial[:n] * t
+        x = self.origin_x[:n] + self.vx[:n] * t + distance * np.cos(angle)
+        y = self.origin_y[:n] + self.vy[:n] * t + distance * np.sin(angle)
+
+        sampled = self.table_length[:n] > 0
+        if sampled.any():
+            # table lookup, blending the two samples either side of t
+            step = t[sampled] / TICK_MS
+            last = self.table_length[:n][sampled] - 1
+            first = np.minimum(np.floor(step).astype(np.int64), last)
+            blend = np.minimum(step - first, 1.0) * (first < last)
+            start = self.table_start[:n][sampled]
+            second = np.minimum(first + 1, last)
+            x[sampled] = self.table_x[start + first] * (1 - blend) + self.table_x[start + second] * blend
+            y[sampled] = self.table_y[start + first] * (1 - blend) + self.table_y[start + second] * blend
+        return x, y
+
+    def update(self, now, target_rect):
+        # moves every bullet to where it is at time now and returns how many hit target_rect (x, y, w, h)
+        # hit and expired bullets are removed; staggered bullets that aren't fired yet can't hit anything
+        # like Battle.update with Bullet objects, a bullet can still hit in the tick it expires
+        n = self.count
+        if n == 0:
+            return 0
+        x, y = self.evaluate(now)
+        self.x[:n] = x
+        self.y[:n] = y
+        age = now - self.born[:n]
+        fired = age >= 0
+        alive = age <= self.lifetime[:n]
+
+        # pygame.Rect truncates float positions, so do the same before the overlap test
+        left = np.trunc(x)
+        top = np.trunc(y)
+        target_x, target_y, target_w, target_h = target_rect
+        hit = fired & (left < target_x + target_w) & (target_x < left + self.width) & \
+              (top < target_y + target_h) & (target_y < top + self.height)
+
+        self.keep(alive & ~hit)
+        return int(np.count_nonzero(hit))
+
+    def keep(self, mask):
+        # compacts the arrays down to the bullets where mask is True, keeping their order
+        kept = int(np.count_nonzero(mask))
+        if kept == self.count:
+            return
+        for name in FIELDS:
+            array = getattr(self, name)
+            array[:kept] = array[:self.count][mask]
+        self.count = kept
+        if kept == 0:
+            self.table_used = 0
+
+    def clear(self):
+        self.count = 0
+        self.table_used = 0
+
+    def positions(self, now=None):
+        # integer top-left corners of the bullets that have been fired, for drawing
+        # given a time, works out where they are right then, so drawing between ticks stays smooth
+        n = self.count
+        if now is None:
+            return np.trunc(self.x[:n]).astype(np.int64), np.trunc(self.y[:n]).astype(np.int64)
+        x, y = self.evaluate(now)
+        fired = self.born[:n] <= now
+        return np.trunc(x[fired]).astype(np.int64), np.trunc(y[fired]).astype(np.int64)
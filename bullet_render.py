@@ -0,0 +1,58 @@
+import pygame
+
+from game_clock import interpolate
+
+# BULLET SPRITES
+# every bullet look (size, colour, angle) is drawn once onto its own surface and reused, so a frame's
+# worth of bullets goes out in one Surface.blits call instead of a pygame.draw.rect call per bullet
+ANGLE_STEP = 15 # rotated variants are cached to the nearest this many degrees
+
+
+class BulletSprites:
+    def __init__(self):
+        self.surfaces = {} # (width, height, colour, angle) -> (surface, x offset, y offset)
+
+    def get(self, width, height, color, angle=0):
+        # the cached surface plus how far to shift it so a rotated sprite stays centred on the bullet
+        angle = round(angle / ANGLE_STEP) * ANGLE_STEP % 360
+        key = (width, height, tuple(color), angle)
+        sprite = self.surfaces.get(key)
+        if sprite is None:
+            sprite = self.render(width, height, color, angle)
+            self.surfaces[key] = sprite
+        return sprite
+
+    def render(self, width, height, color, angle):
+        display_ready = pygame.display.get_surface() is not None # convert needs a window
+        if not angle:
+            surface = pygame.Surface((width, height))
+            surface.fill(color)
+            return (surface.convert() if display_ready else surface), 0, 0
+
+        surface = pygame.Surface((width, height), pygame.SRCALPHA)
+        surface.fill(color)
+        surface = pygame.transform.rotate(surface, angle)
+        if display_ready:
+            surface = surface.convert_alpha()
+        return surface, (width - surface.get_width()) // 2, (height - surface.get_height()) // 2
+
+    def draw(self, target, positions, width, height, color, angle=0):
+        # blits one look at every (x, y) top left in positions
+        surface, offset_x, offset_y = self.get(width, height, color, angle)
+        if offset_x or offset_y:
+            positions = [(x + offset_x, y + offset_y) for x, y in positions]
+        target.blits([(surface, position) for position in positions], doreturn=False)
+
+    def draw_bullets(self, target, bullets, alpha=1.0):
+        # Bullet objects, grouped by look so each look is still one blits call
+        # alpha blends from where each bullet was at the last tick (see game_clock.py)
+        groups = {}
+        for bullet in bullets:
+            position = (int(interpolate(bullet.previous_x, bullet.x, alpha)),
+                        int(interpolate(bullet.previous_y, bullet.y, alpha)))
+            groups.setdefault((bullet.width, bullet.height, bullet.color), []).append(position)
+        for (width, height, color), positions in groups.items():
+            self.draw(target, positions, width, height, color)
+
+
+bullet_sprites = BulletSprites()
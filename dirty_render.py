@@ -0,0 +1,56 @@
+import pygame
+
+# DIRTY RECTANGLE RENDERER
+# instead of redrawing and flipping the whole screen every frame, only the bits that changed are
+# touched: the background is put back where sprites were last frame, the sprites are drawn at their
+# new spots, and just those rectangles are sent to pygame.display.update
+# anything that changes the whole picture (a room switch, coming back from a battle) does one full
+# redraw and flip, which also takes a fresh copy of the background to restore from
+
+
+class DirtyRenderer:
+    def __init__(self, screen):
+        self.screen = screen
+        self.background = None # copy of the screen with only the background drawn
+        self.owner = None # what the background belongs to (the room), a new owner means a full redraw
+        self.full_redraw = True
+        self.previous_rects = [] # where sprites were drawn last frame
+        self.rects = [] # where sprites have been drawn this frame
+        self.pixels_updated = 0 # pixels sent to the display last frame
+
+    def invalidate(self):
+        self.full_redraw = True
+
+    def needs_full_redraw(self, owner):
+        return self.full_redraw or owner is not self.owner
+
+    def set_background(self, owner):
+        # call once the full background has been drawn to the screen
+        self.background = self.screen.copy()
+        self.owner = owner
+        self.previous_rects = []
+        self.rects = []
+        self.full_redraw = True # this frame still needs a full flip
+
+    def restore(self):
+        # puts the background back under last frame's sprites
+        for rect in self.previous_rects:
+            self.screen.blit(self.background, rect, rect)
+
+    def add(self, rect):
+        # records something drawn this frame (the Rect that Surface.blit returns)
+        if rect is not None and rect.width and rect.height:
+            self.rects.append(rect)
+
+    def present(self):
+        if self.full_redraw:
+            pygame.display.flip()
+            self.full_redraw = False
+            self.pixels_updated = self.screen.get_width() * self.screen.get_height()
+        else:
+            # old spots need the background shown again, new spots need the sprites shown
+            changed = self.previous_rects + self.rects
+            pygame.display.update(changed)
+            self.pixels_updated = sum(rect.width * rect.height for rect in changed)
+        self.previous_rects = self.rects
+        self.rects = []
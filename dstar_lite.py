@@ -0,0 +1,272 @@
+import heapq
+
+# D* LITE
+# incremental planner for a bullet chasing the heart
+# the search is rooted at the goal (the heart) and keeps its g/rhs values between calls, so when
+# the bullet moves only the part of the search that changed gets repaired instead of starting again
+# when the heart moves, the search tree is re-rooted at its new tile like Moving Target D* Lite's
+# deletion step (see move_goal) instead of being repaired node by node from the old goal
+# g, rhs and the search tree live in flat arrays indexed like FlatGrid, the same way astar_flat does
+# it expands fewer nodes than rerunning A* every step, but in wall time it only beats astar_flat
+# once the heart moves less often than about every 4th step (see benchmarks/bench_pathfinding.py),
+# so the chase attack uses pathfinding.PathReplanner (astar_flat through the path cache) instead
+
+INFINITY = float("inf")
+
+
+def neighbor_lists(flat_grid):
+    # index -> in-bounds neighbour indexes (left, right, up, down), the same list without walls,
+    # and each index's x and y; worked out once per grid and kept on it for every planner to share
+    if flat_grid.neighbor_lists is None:
+        width = flat_grid.width
+        height = flat_grid.height
+        cells = flat_grid.cells
+        links = []
+        open_links = []
+        for index in range(width * height):
+            x = index % width
+            y = index // width
+            neighbors = []
+            if x > 0:
+                neighbors.append(index - 1)
+            if x < width - 1:
+                neighbors.append(index + 1)
+            if y > 0:
+                neighbors.append(index - width)
+            if y < height - 1:
+                neighbors.append(index + width)
+            links.append(neighbors)
+            open_links.append([neighbor for neighbor in neighbors if not cells[neighbor]])
+        xs = [index % width for index in range(width * height)]
+        ys = [index // width for index in range(width * height)]
+        flat_grid.neighbor_lists = (links, open_links, xs, ys)
+    return flat_grid.neighbor_lists
+
+
+# D* LITE PLANNER CLASS - one per chasing bullet
+# start and goal are (x, y) tiles, everything inside works on flat indexes
+class DStarLite:
+    def __init__(self, flat_grid, start, goal, max_expansions=None):
+        self.flat_grid = flat_grid
+        self.width = flat_grid.width
+        self.links, self.open_links, self.xs, self.ys = neighbor_lists(flat_grid)
+        self.max_expansions = max_expansions  # per update, None means search as long as needed
+        self.start = self.index(start)
+        self.last_start = self.start
+        self.goal = self.index(goal)
+        self.km = 0  # key modifier, grows as the start moves so old queue keys stay usable
+        self.expansions = 0  # total, to compare with replanning from scratch
+        self.restart()
+
+    def index(self, tile):
+        return tile[1] * self.width + tile[0]
+
+    def heuristic(self, a, b):
+        return abs(self.xs[a] - self.xs[b]) + abs(self.ys[a] - self.ys[b])
+
+    def calculate_key(self, node):
+        g = self.g[node]
+        rhs = self.rhs[node]
+        best = g if g < rhs else rhs
+        start = self.start
+        return (best + abs(self.xs[start] - self.xs[node]) + abs(self.ys[start] - self.ys[node]) + self.km, best)
+
+    def push(self, node):
+        key = self.calculate_key(node)
+        self.queued[node] = key
+        heapq.heappush(self.open_set, (key, node))
+
+    def top(self):
+        # smallest key still in the queue, throwing away entries that were replaced or removed
+        open_set = self.open_set
+        queued = self.queued
+        while open_set:
+            key, node = open_set[0]
+            if queued[node] == key:
+                return key, node
+            heapq.heappop(open_set)
+        return (INFINITY, INFINITY), None
+
+    def set_rhs(self, node):
+        # cost of stepping into a wall is infinite, stepping out of one (a bullet spawned in it) is fine
+        if node == self.goal:
+            rhs = 0
+            parent = -1
+        else:
+            g = self.g
+            rhs = INFINITY
+            parent = -1
+            for neighbor in self.open_links[node]:
+                cost = g[neighbor] + 1
+                if cost < rhs:
+                    rhs = cost
+                    parent = neighbor
+        if not self.known[node] and rhs != INFINITY:
+            self.known[node] = 1
+            self.touched.append(node)
+        self.rhs[node] = rhs
+        self.parent[node] = parent
+
+    def update_vertex(self, node):
+        self.set_rhs(node)
+        if self.g[node] != self.rhs[node]:
+            self.push(node)
+        else:
+            self.queued[node] = None
+
+    def compute_shortest_path(self):
+        g = self.g
+        rhs = self.rhs
+        cells = self.flat_grid.cells
+        links = self.links
+        start = self.start
+        expanded = 0
+        while True:
+            top_key, node = self.top()
+            if node is None or (top_key >= self.calculate_key(start) and rhs[start] == g[start]):
+                return True
+            if self.max_expansions is not None and expanded >= self.max_expansions:
+                return False  # carries on from here next update
+
+            expanded += 1
+            self.expansions += 1
+            new_key = self.calculate_key(node)
+            if top_key < new_key:
+                self.push(node)  # key was out of date, put it back in the right place
+                continue
+
+            self.queued[node] = None
+            heapq.heappop(self.open_set)
+            if g[node] > rhs[node]:
+                # overconsistent: distance went down, pass it on to the neighbours
+                g[node] = rhs[node]
+                if not cells[node]:
+                    for neighbor in links[node]:
+                        self.update_vertex(neighbor)
+            else:
+                # underconsistent: distance went up, recompute this node and its neighbours
+                g[node] = INFINITY
+                self.update_vertex(node)
+                if not cells[node]:
+                    for neighbor in links[node]:
+                        self.update_vertex(neighbor)
+
+    def update(self, start, goal):
+        # call when the bullet reaches a new tile; repairs the search and returns the next tile
+        start = self.index(start)
+        goal = self.index(goal)
+        if start != self.start:
+            self.km += self.heuristic(self.last_start, start)
+            self.last_start = start
+            self.start = start
+
+        if goal != self.goal:
+            self.move_goal(goal)
+
+        self.compute_shortest_path()
+        return self.next_step()
+
+    def move_goal(self, goal):
+        # deletion step: the branch of the search tree whose paths run through the new goal keeps them,
+        # and is now that much closer; everything else can still go via the old goal, so is that much
+        # further away. every value stays an upper bound on the real distance, so the repair only ever
+        # lowers values (the cheap direction) and stops as soon as the bullet's tile is settled
+        g = self.g
+        rhs = self.rhs
+        shift = g[goal]  # steps from the new goal to the old one
+        old_goal = self.goal
+        self.goal = goal
+        if shift == INFINITY:
+            self.restart()  # the heart went somewhere the old search never reached
+            return
+
+        kept = self.subtree(goal)
+        for node in self.touched:
+            if kept[node]:
+                g[node] -= shift
+                rhs[node] -= shift
+            else:
+                g[node] += shift
+                rhs[node] += shift
+
+        # a node keeps a correct rhs unless a neighbour moved the other way, so only the edge between
+        # the two parts (and both goals) need it worked out again
+        changed = {goal, old_goal}
+        links = self.links
+        for node in self.touched:
+            side = kept[node]
+            for neighbor in links[node]:
+                if kept[neighbor] != side and rhs[neighbor] != INFINITY:
+                    changed.add(node)
+                    changed.add(neighbor)
+        for node in changed:
+            self.set_rhs(node)
+
+        # the queue is rebuilt from the nodes that are now inconsistent, so old keys (and km) can go
+        queued = self.queued
+        candidates = changed
+        candidates.update(node for _, node in self.open_set if queued[node] is not None)
+        self.km = 0
+        self.last_start = self.start
+        self.open_set = []
+        for node in candidates:
+            queued[node] = None
+        for node in candidates:
+            if g[node] != rhs[node]:
+                self.push(node)
+
+    def subtree(self, root):
+        # 1 for every node whose search-tree path to the goal passes through root
+        # each node is decided once, by following parents until reaching a node that already is
+        parent = self.parent
+        kept = bytearray(len(parent))
+        done = bytearray(len(parent))
+        kept[root] = 1
+        done[root] = 1
+        for node in self.touched:
+            chain = []
+            while not done[node] and node != -1:
+                chain.append(node)
+                done[node] = 1
+                node = parent[node]
+            inside = node != -1 and kept[node]
+            if inside:
+                for link in chain:
+                    kept[link] = 1
+        return kept
+
+    def restart(self):
+        # new search from nothing, for when the heart lands somewhere the old search never reached
+        size = self.flat_grid.width * self.flat_grid.height
+        self.g = [INFINITY] * size
+        self.rhs = [INFINITY] * size
+        self.parent = [-1] * size
+        self.queued = [None] * size  # node -> its current key, None if it isn't queued
+        self.open_set = []  # heap of (key, node), old entries are skipped when popped
+        self.touched = [self.goal]  # every node that has had a finite rhs, each once
+        self.known = bytearray(size)  # 1 for the nodes in touched
+        self.known[self.goal] = 1
+        self.rhs[self.goal] = 0
+        self.km = 0
+        self.last_start = self.start
+        self.push(self.goal)
+
+    def distance(self):
+        # steps from start to goal, None if there's no way through
+        g = self.g[self.start]
+        if g == INFINITY or self.rhs[self.start] != g:
+            return None
+        return g
+
+    def next_step(self):
+        if self.start == self.goal or self.distance() is None:
+            return None
+        best = None
+        best_cost = INFINITY
+        # same neighbour order as the A* searches so ties go the same way
+        for neighbor in self.open_links[self.start]:
+            cost = self.g[neighbor] + 1
+            if cost < best_cost:
+                best = neighbor
+                best_cost = cost
+        return (best % self.width, best // self.width)
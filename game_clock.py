@@ -0,0 +1,46 @@
+# FIXED TIMESTEP CLOCK
+# game logic always advances in fixed 60 Hz ticks, however fast or slow frames are drawn
+# each frame adds its real time to an accumulator and runs as many whole ticks as fit; whatever is
+# left over (alpha, 0 to 1) is how far we are towards the next tick, so drawing can blend between
+# where things were at the last tick and where they are now
+# speeds (Player.speed, Enemy.speed, Bullet.speed, battle_player_speed) are pixels per tick, set from
+# pixels per second with per_tick so the game plays at the same speed whatever TICK_RATE is
+TICK_RATE = 60
+TICK_MS = 1000 / TICK_RATE
+MAX_FPS = 144 # drawing can run faster than the logic
+
+
+def per_tick(pixels_per_second):
+    # the original loop flipped and ticked twice a frame, so its logic ran at about 30 Hz; its
+    # per-frame speeds times 30 are the per-second speeds the game is tuned for
+    return pixels_per_second / TICK_RATE
+
+
+class FixedStepClock:
+    def __init__(self, tick_ms=TICK_MS, max_ticks=5):
+        self.tick_ms = tick_ms
+        self.max_ticks = max_ticks # after a long stall, slow down rather than run a huge burst of ticks
+        self.accumulator = 0.0
+        self.ticks = 0 # ticks run so far
+
+    def advance(self, frame_ms):
+        # adds a frame's time and returns how many ticks to run for it
+        self.accumulator = min(self.accumulator + frame_ms, self.tick_ms * self.max_ticks)
+        ticks = int(self.accumulator // self.tick_ms)
+        self.accumulator -= ticks * self.tick_ms
+        self.ticks += ticks
+        return ticks
+
+    def alpha(self):
+        return self.accumulator / self.tick_ms
+
+    def reset(self):
+        # drops any time owed, e.g. after switching screens
+        self.accumulator = 0.0
+
+
+def interpolate(previous, current, alpha, max_jump=60):
+    # position to draw at between two ticks; teleports (room switches, respawns) aren't smoothed
+    if abs(current - previous) > max_jump:
+        return current
+    return previous + (current - previous) * alpha
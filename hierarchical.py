@@ -0,0 +1,407 @@
+import heapq
+from collections import deque
+
+# HIERARCHICAL PATHFINDING (HPA*)
+# the grid is cut into square clusters; tiles where two clusters meet become entrance nodes
+# a long query searches the small graph of entrances and only fills in tile steps at the end
+# the distances between the entrances inside a cluster are worked out the first time a search
+# reaches that cluster and kept, so building the graph is just a scan of the cluster borders and
+# the tile paths behind those distances are only found for the edges a route actually uses
+# paths are close to the shortest but not always exactly the shortest
+# the game's 32x18 rooms are searched quicker by plain astar_flat, so nothing in the game uses this
+# yet; it's for much bigger maps or routes across rooms (WorldGraph), see benchmarks/bench_pathfinding.py
+
+
+def is_open(flat_grid, x, y):
+    return 0 <= x < flat_grid.width and 0 <= y < flat_grid.height and not flat_grid.cells[y * flat_grid.width + x]
+
+
+# CLUSTER GRAPH CLASS
+# the abstract graph for one grid (one room)
+class ClusterGraph:
+    def __init__(self, flat_grid, cluster_size=8):
+        self.flat_grid = flat_grid
+        self.cluster_size = cluster_size
+        self.clusters_x = (flat_grid.width + cluster_size - 1) // cluster_size
+        self.clusters_y = (flat_grid.height + cluster_size - 1) // cluster_size
+
+        self.edges = {}          # entrance tile -> list of (tile, cost)
+        self.edge_paths = {}     # (a, b) -> tiles walked from a to b, without a
+        self.cluster_nodes = {}  # cluster -> entrance tiles inside it
+        self.searched = set()    # clusters whose inside edges are in self.edges already
+        self.build()
+
+    def cluster_of(self, tile):
+        return (tile[0] // self.cluster_size, tile[1] // self.cluster_size)
+
+    def cluster_bounds(self, cluster):
+        left = cluster[0] * self.cluster_size
+        top = cluster[1] * self.cluster_size
+        right = min(left + self.cluster_size, self.flat_grid.width)
+        bottom = min(top + self.cluster_size, self.flat_grid.height)
+        return left, top, right, bottom
+
+    def add_node(self, tile):
+        if tile not in self.edges:
+            self.edges[tile] = []
+            self.cluster_nodes.setdefault(self.cluster_of(tile), []).append(tile)
+
+    def add_edge(self, a, b, cost, path):
+        self.edges[a].append((b, cost))
+        self.edge_paths[(a, b)] = path
+
+    def add_entrances(self, pairs):
+        # pairs are the open tile pairs along one border; each unbroken run gets one entrance
+        # in the middle, or one at each end if it's long
+        runs = []
+        for pair in pairs:
+            if pair is None:
+                runs.append([])
+            elif runs:
+                runs[-1].append(pair)
+            else:
+                runs.append([pair])
+        for run in runs:
+            if not run:
+                continue
+            chosen = [run[len(run) // 2]] if len(run) < 6 else [run[0], run[-1]]
+            for a, b in chosen:
+                self.add_node(a)
+                self.add_node(b)
+                self.add_edge(a, b, 1, (b,))
+                self.add_edge(b, a, 1, (a,))
+
+    def build(self):
+        grid = self.flat_grid
+        size = self.cluster_size
+
+        # borders between a cluster and the one to its right
+        for border_x in range(size - 1, grid.width - 1, size):
+            for cluster_top in range(0, grid.height, size):
+                pairs = []
+                for y in range(cluster_top, min(cluster_top + size, grid.height)):
+                    if is_open(grid, border_x, y) and is_open(grid, border_x + 1, y):
+                        pairs.append(((border_x, y), (border_x + 1, y)))
+                    else:
+                        pairs.append(None)
+                self.add_entrances(pairs)
+
+        # borders between a cluster and the one below it
+        for border_y in range(size - 1, grid.height - 1, size):
+            for cluster_left in range(0, grid.width, size):
+                pairs = []
+                for x in range(cluster_left, min(cluster_left + size, grid.width)):
+                    if is_open(grid, x, border_y) and is_open(grid, x, border_y + 1):
+                        pairs.append(((x, border_y), (x, border_y + 1)))
+                    else:
+                        pairs.append(None)
+                self.add_entrances(pairs)
+
+    def neighbors(self, tile):
+        # (tile, cost) for every edge out of an entrance, searching its cluster first if needed
+        cluster = self.cluster_of(tile)
+        if cluster not in self.searched:
+            self.search_entrances(cluster)
+        return self.edges.get(tile, ())
+
+    def search_entrances(self, cluster):
+        # distances between the entrances of one cluster, walking only inside it
+        # inside a cluster a -> b costs the same as b -> a, so each pair is only searched once
+        self.searched.add(cluster)
+        nodes = self.cluster_nodes.get(cluster, [])
+        if len(nodes) < 2:
+            return
+        width = self.flat_grid.width
+        links = self.cluster_links(cluster)
+        for index, node in enumerate(nodes):
+            targets = {y * width + x: (x, y) for x, y in nodes[index + 1:]}
+            for other, cost in bfs_distances(links, node[1] * width + node[0], targets).items():
+                self.edges[node].append((other, cost))
+                self.edges[other].append((node, cost))
+
+    def cluster_links(self, cluster):
+        # open tile index -> open neighbour indexes, for the tiles of one cluster
+        left, top, right, bottom = self.cluster_bounds(cluster)
+        cells = self.flat_grid.cells
+        width = self.flat_grid.width
+        links = {}
+        for y in range(top, bottom):
+            for x in range(left, right):
+                index = y * width + x
+                if cells[index]:
+                    continue
+                neighbors = []
+                if x > left and not cells[index - 1]:
+                    neighbors.append(index - 1)
+                if x + 1 < right and not cells[index + 1]:
+                    neighbors.append(index + 1)
+                if y > top and not cells[index - width]:
+                    neighbors.append(index - width)
+                if y + 1 < bottom and not cells[index + width]:
+                    neighbors.append(index + width)
+                links[index] = neighbors
+        return links
+
+    def edge_path(self, a, b):
+        # tiles walked from a to b along an edge, found the first time a route uses it
+        path = self.edge_paths.get((a, b))
+        if path is None:
+            path = self.search_cluster(a, self.cluster_of(a), [b])[b]
+            self.edge_paths[(a, b)] = path
+        return path
+
+    def search_cluster(self, start, cluster, targets):
+        # BFS from start that stays inside cluster, returns {target: path} for every target it reaches
+        left, top, right, bottom = self.cluster_bounds(cluster)
+        grid = self.flat_grid
+        wanted = set(targets)
+        wanted.discard(start)
+        came_from = {start: None}
+        queue = deque([start])
+        found = {}
+
+        while queue and len(found) < len(wanted):
+            current = queue.popleft()
+            if current in wanted:
+                path = []
+                node = current
+                while node != start:
+                    path.append(node)
+                    node = came_from[node]
+                path.reverse()
+                found[current] = tuple(path)
+
+            x, y = current
+            for nx, ny in ((x - 1, y), (x + 1, y), (x, y - 1), (x, y + 1)):
+                if left <= nx < right and top <= ny < bottom and (nx, ny) not in came_from \
+                        and is_open(grid, nx, ny):
+                    came_from[(nx, ny)] = current
+                    queue.append((nx, ny))
+        return found
+
+    def connect(self, tile, extra_edges, extra_paths, reverse=False):
+        # links a query's start or goal to the entrances of its cluster without changing the graph
+        if not reverse and not is_open(self.flat_grid, *tile):
+            # a start inside a wall (A* allows it) steps out into any open neighbour first,
+            # which might be over the border in the next cluster
+            x, y = tile
+            for neighbor in ((x - 1, y), (x + 1, y), (x, y - 1), (x, y + 1)):
+                if is_open(self.flat_grid, *neighbor):
+                    extra_edges.setdefault(tile, []).append((neighbor, 1))
+                    extra_paths[(tile, neighbor)] = (neighbor,)
+                    self.connect(neighbor, extra_edges, extra_paths)
+            return
+
+        cluster = self.cluster_of(tile)
+        for other, path in self.search_cluster(tile, cluster, self.cluster_nodes.get(cluster, [])).items():
+            if reverse:
+                # grid moves work both ways, so flip the path to go entrance -> tile
+                back = tuple(reversed((tile,) + path[:-1]))
+                extra_edges.setdefault(other, []).append((tile, len(path)))
+                extra_paths[(other, tile)] = back
+            else:
+                extra_edges.setdefault(tile, []).append((other, len(path)))
+                extra_paths[(tile, other)] = path
+
+    def find_path(self, start, goal, max_expansions=None, stats=None):
+        grid = self.flat_grid
+        if not grid.in_bounds(*start) or not is_open(grid, *goal) or start == goal:
+            return []
+
+        if not is_open(grid, *start):
+            # a start inside a wall (A* allows it) steps out to whichever open neighbour is quickest
+            best = []
+            x, y = start
+            for neighbor in ((x - 1, y), (x + 1, y), (x, y - 1), (x, y + 1)):
+                if neighbor == goal:
+                    return [goal]
+                if is_open(grid, *neighbor):
+                    rest = self.find_path(neighbor, goal, max_expansions, stats)
+                    if rest and (not best or len(rest) + 1 < len(best)):
+                        best = [neighbor] + rest
+            return best
+
+        # short trips inside one cluster don't need the abstract graph
+        if self.cluster_of(start) == self.cluster_of(goal):
+            local = self.search_cluster(start, self.cluster_of(start), [goal])
+            if goal in local:
+                if stats is not None:
+                    stats["expansions"] = 0
+                return list(local[goal])
+
+        extra_edges = {}
+        extra_paths = {}
+        self.connect(start, extra_edges, extra_paths)
+        self.connect(goal, extra_edges, extra_paths, reverse=True)
+
+        def neighbors(node):
+            yield from self.neighbors(node)
+            yield from extra_edges.get(node, ())
+
+        abstract_path = abstract_search(start, goal, neighbors,
+                                        lambda node: abs(node[0] - goal[0]) + abs(node[1] - goal[1]),
+                                        max_expansions, stats)
+        return refine(abstract_path, lambda a, b: extra_paths.get((a, b)) or self.edge_path(a, b))
+
+
+def abstract_search(start, goal, neighbors, heuristic, max_expansions=None, stats=None):
+    # A* over entrance nodes; nodes can be reopened so a heuristic that isn't consistent still works
+    # equal f goes to the node furthest along (-g sorts first): with Manhattan distance on a grid
+    # every node in the box between start and goal ties, and otherwise all of them get expanded
+    open_set = [(heuristic(start), 0, start)]
+    g_score = {start: 0}
+    came_from = {start: None}
+    expansions = 0
+
+    while open_set:
+        _, g, current = heapq.heappop(open_set)
+        g = -g
+        if g > g_score[current]:
+            continue  # found a cheaper way here since this was queued
+        if current == goal:
+            break
+        expansions += 1
+        if max_expansions is not None and expansions > max_expansions:
+            current = None
+            break
+        for neighbor, cost in neighbors(current):
+            tentative_g = g + cost
+            if neighbor not in g_score or tentative_g < g_score[neighbor]:
+                g_score[neighbor] = tentative_g
+                came_from[neighbor] = current
+                heapq.heappush(open_set, (tentative_g + heuristic(neighbor), -tentative_g, neighbor))
+    else:
+        current = None
+
+    if stats is not None:
+        stats["expansions"] = expansions
+    if current != goal:
+        return []
+
+    nodes = []
+    while current is not None:
+        nodes.append(current)
+        current = came_from[current]
+    nodes.reverse()
+    return nodes
+
+
+def bfs_distances(links, start, targets):
+    # steps from start to each of targets ({index: tile}) it can reach, following links
+    found = {}
+    seen = {start}
+    frontier = [start]
+    steps = 0
+    while frontier and len(found) < len(targets):
+        steps += 1
+        next_frontier = []
+        for index in frontier:
+            for neighbor in links[index]:
+                if neighbor not in seen:
+                    seen.add(neighbor)
+                    next_frontier.append(neighbor)
+                    if neighbor in targets:
+                        found[targets[neighbor]] = steps
+        frontier = next_frontier
+    return found
+
+
+def refine(abstract_path, edge_path):
+    # swaps each abstract edge for the tiles it stands for
+    path = []
+    for a, b in zip(abstract_path, abstract_path[1:]):
+        path.extend(edge_path(a, b))
+    return path
+
+
+def get_cluster_graph(flat_grid, cluster_size=8):
+    # built once per grid and kept on it, so a rebuilt room grid gets a fresh graph
+    if cluster_size not in flat_grid.cluster_graphs:
+        flat_grid.cluster_graphs[cluster_size] = ClusterGraph(flat_grid, cluster_size)
+    return flat_grid.cluster_graphs[cluster_size]
+
+
+# WORLD GRAPH CLASS
+# joins the cluster graphs of several rooms with the doorways between them
+# links are (from_room, from_tile, to_room, to_tile): walking onto from_tile moves you to to_tile
+# routes come back as a list of (room_name, tile)
+# edges inside a room are read from that room's cluster graph as the search gets to them
+class WorldGraph:
+    def __init__(self, room_grids, links, cluster_size=8):
+        self.room_grids = room_grids
+        self.graphs = {name: get_cluster_graph(grid, cluster_size) for name, grid in room_grids.items()}
+        self.edges = {}       # (room, tile) -> list of ((room, tile), cost), doorways only
+        self.edge_paths = {}  # ((room, a), (room, b)) -> list of (room, tile)
+
+        for from_room, from_tile, to_room, to_tile in links:
+            # each doorway tile joins the entrances of its cluster, then the link crosses rooms
+            self.join_cluster(from_room, from_tile)
+            self.join_cluster(to_room, to_tile)
+            self.add_edge((from_room, from_tile), (to_room, to_tile), 1, [(to_room, to_tile)])
+
+    def add_edge(self, a, b, cost, path):
+        self.edges.setdefault(a, []).append((b, cost))
+        self.edge_paths[(a, b)] = path
+
+    def join_cluster(self, room_name, tile):
+        graph = self.graphs[room_name]
+        if (room_name, tile) in self.edges or tile in graph.edges:
+            return  # already a node
+        edges = {}
+        paths = {}
+        graph.connect(tile, edges, paths)
+        graph.connect(tile, edges, paths, reverse=True)
+        for a, neighbors in edges.items():
+            for b, cost in neighbors:
+                self.add_edge((room_name, a), (room_name, b), cost,
+                              [(room_name, step) for step in paths[(a, b)]])
+        self.edges.setdefault((room_name, tile), [])
+
+    def find_route(self, start_room, start, goal_room, goal, max_expansions=None, stats=None):
+        start_node = (start_room, start)
+        goal_node = (goal_room, goal)
+        if start_node == goal_node or not is_open(self.room_grids[goal_room], *goal):
+            return []
+
+        extra_edges = {}
+        extra_paths = {}
+        start_graph = self.graphs[start_room]
+        goal_graph = self.graphs[goal_room]
+
+        for graph, room_name, tile, reverse in ((start_graph, start_room, start, False),
+                                                (goal_graph, goal_room, goal, True)):
+            edges = {}
+            paths = {}
+            graph.connect(tile, edges, paths, reverse)
+            for a, neighbors in edges.items():
+                for b, cost in neighbors:
+                    extra_edges.setdefault((room_name, a), []).append(((room_name, b), cost))
+                    extra_paths[((room_name, a), (room_name, b))] = [(room_name, step) for step in paths[(a, b)]]
+
+        # same room and same cluster: walk straight there if we can
+        if start_room == goal_room and start_graph.cluster_of(start) == start_graph.cluster_of(goal):
+            local = start_graph.search_cluster(start, start_graph.cluster_of(start), [goal])
+            if goal in local:
+                return [(goal_room, step) for step in local[goal]]
+
+        def neighbors(node):
+            room_name, tile = node
+            for other, cost in self.graphs[room_name].neighbors(tile):
+                yield (room_name, other), cost
+            yield from self.edges.get(node, ())
+            yield from extra_edges.get(node, ())
+
+        def edge_path(a, b):
+            path = extra_paths.get((a, b)) or self.edge_paths.get((a, b))
+            if path is None:
+                path = [(a[0], step) for step in self.graphs[a[0]].edge_path(a[1], b[1])]
+            return path
+
+        def heuristic(node):
+            # Manhattan only means something inside the goal's room
+            if node[0] != goal_room:
+                return 0
+            return abs(node[1][0] - goal[0]) + abs(node[1][1] - goal[1])
+
+        abstract_path = abstract_search(start_node, goal_node, neighbors, heuristic, max_expansions, stats)
+        return refine(abstract_path, edge_path)
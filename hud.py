@@ -0,0 +1,54 @@
+import pygame
+
+# HUD LAYER
+# HP bars, HP numbers and level labels only change when a value does, so each widget keeps the value
+# it last showed and its own drawn surface, and is only redrawn when the value differs
+# the widgets are composited onto one overlay covering all of them, so drawing the HUD each frame is
+# a single blit of that overlay
+CLEAR = (0, 0, 0, 0)
+
+
+class HudWidget:
+    def __init__(self, rect, value, render):
+        self.rect = pygame.Rect(rect) # where it goes on screen, widgets in a layer must not overlap
+        self.value = value # function returning what the widget shows, anything comparable with ==
+        self.render = render # function(surface, value) drawing the widget with (0, 0) at rect's top left
+        self.surface = pygame.Surface(self.rect.size, pygame.SRCALPHA)
+        self.last_value = None
+        self.drawn = False
+
+    def refresh(self):
+        # redraws if the value has changed, returns whether it did
+        value = self.value()
+        if self.drawn and value == self.last_value:
+            return False
+        self.surface.fill(CLEAR)
+        self.render(self.surface, value)
+        self.last_value = value
+        self.drawn = True
+        return True
+
+
+class HudLayer:
+    def __init__(self, widgets):
+        self.widgets = widgets
+        self.rect = widgets[0].rect.unionall([widget.rect for widget in widgets[1:]])
+        self.surface = pygame.Surface(self.rect.size, pygame.SRCALPHA)
+        self.redraws = 0 # widgets redrawn so far
+
+    def invalidate(self):
+        for widget in self.widgets:
+            widget.drawn = False
+
+    def refresh(self):
+        for widget in self.widgets:
+            if widget.refresh():
+                area = widget.rect.move(-self.rect.x, -self.rect.y)
+                self.surface.fill(CLEAR, area)
+                self.surface.blit(widget.surface, area)
+                self.redraws += 1
+
+    def draw(self, target):
+        # returns the blit rect, like Surface.blit
+        self.refresh()
+        return target.blit(self.surface, self.rect)
@@ -3,10 +3,27 @@ import sqlite3
 import hashlib
 import math 
 import random
-import heapq
+from pathfinding import TILE_SIZE, GRID_WIDTH, GRID_HEIGHT, build_grid, FlatGrid, PathCache, FlowField, PathReplanner
+from path_strategies import get_path_strategy
+from path_workers import PathWorkerPool
+from rasterize import HAS_NUMPY, rasterize_tiles
+from room_layouts import ROOM_OBSTACLES
+from spatial import SMALL_ROOM_OBSTACLES, StaticGridIndex, SpatialHash, rects_overlap
+from bullet_arrays import BulletArrays
+from attack_patterns import ATTACK_PATTERNS, spawn_pattern
+from bullet_render import bullet_sprites
+from game_clock import MAX_FPS, FixedStepClock, interpolate, per_tick
+from scenes import Scene, SceneManager
+from dirty_render import DirtyRenderer
+from text_cache import fonts, text_cache
+from hud import HudWidget, HudLayer
+from sprite_atlas import sprite_atlas
+from assets import assets
+from battle_assets import BattleAssets, get_button
 
 pygame.init()
 clock = pygame.time.Clock()
+game_clock = FixedStepClock() # runs the game logic at a steady 60 ticks a second
 screen = pygame.display.set_mode((1300, 720))
 pygame.display.set_caption('UDDERWORLD')
 
@@ -19,29 +36,28 @@ yellow = (255, 255, 0)
 pink = (255, 16, 240)
 white = (255, 255, 255)
 
-# load the background image once outside the loop
-background_image = pygame.image.load('background.png').convert()
-controls1_image = pygame.image.load('controls1.png').convert()
-controls2_image = pygame.image.load('controls2.png').convert()
-room1_image = pygame.image.load('room1.png').convert()
-rescaled_image = pygame.transform.scale(room1_image, (1300, 720))
-room1_image = rescaled_image
+# load the background image once outside the loop, images are shared through the asset manager (assets.py)
+# only the main menu's background is decoded before the first frame, the rest arrive in the background
+# roughly in the order the screens need them; a screen only waits if its image hasn't arrived yet
+background_image = assets.acquire('background.png')
+assets.preload(['controls1.png', 'room1.png', 'cows_spritesheet_white_pinkspots.png', 'room2.png',
+                'Carrot-sheet.png', 'room3.png', 'controls2.png', 'cow_battle.png', 'carrot_battle.png',
+                'butterknife.PNG'])
 room1_subtitle_timer = None
 room1_subtitle_duration = 3000
 current_username = None
 previous_room_name = "room1"
 
-
-# A* VARIABLES
-TILE_SIZE = 40
-GRID_WIDTH = 1300 // TILE_SIZE
-GRID_HEIGHT = 720 // TILE_SIZE
+# finished bullet paths shared by the wave spawner and the bullets
+path_cache = PathCache(max_size=256)
+# background threads that search for paths so waves spawn without waiting
+path_workers = PathWorkerPool(workers=2)
 
 # TEXT FONT AND TEXT DEFINITIONS
-subtitle_font = pygame.font.Font('pixelFont.ttf', 80)
-box_subtitle_font = pygame.font.Font('pixelFont.ttf', 30)
-button_font = pygame.font.Font('pixelFont.ttf', 75)
-username_font = pygame.font.Font('pixelFont.ttf', 40)
+subtitle_font = fonts.get(80)
+box_subtitle_font = fonts.get(30)
+button_font = fonts.get(75)
+username_font = fonts.get(40)
 
 # login messages handling
 error_message = ""
@@ -152,42 +168,6 @@ def hashing(password):
     hashed_password = sha3_256(password).hexdigest()
     return hashed_password
 
-# A* PATHFINDING ALGORITHM
-def astar_pathfinding(grid, start, goal):
-            def heuristic(a, b):
-                return abs(a[0] - b[0]) + abs(a[1] - b[1])
-
-            open_set = []
-            heapq.heappush(open_set, (0, start))
-            came_from = {}
-            g_score = {start: 0}
-            f_score = {start: heuristic(start, goal)}
-
-            while open_set:
-                _, current = heapq.heappop(open_set)
-                if current == goal:
-                    path = []
-                    while current in came_from:
-                        path.append(current)
-                        current = came_from[current]
-                    path.reverse()
-                    return path
-
-                x, y = current
-                for dx, dy in [(-1,0),(1,0),(0,-1),(0,1)]:  # 4-directional
-                    neighbor = (x + dx, y + dy)
-                    if 0 <= neighbor[0] < GRID_WIDTH and 0 <= neighbor[1] < GRID_HEIGHT:
-                        if grid[neighbor[1]][neighbor[0]] == 1: continue  # skip walls
-                        tentative_g = g_score[current] + 1
-                        if neighbor not in g_score or tentative_g < g_score[neighbor]:
-                            came_from[neighbor] = current
-                            g_score[neighbor] = tentative_g
-                            f_score[neighbor] = tentative_g + heuristic(neighbor, goal)
-                            heapq.heappush(open_set, (f_score[neighbor], neighbor))
-            return []
-
-
-
 # OOP INPUT CLASS
 class Input_Box:
     def __init__(self, x, y, width, height, input=''):
@@ -206,11 +186,11 @@ class Input_Box:
 
     def set_font_size(self, size):
         # updates the font size for the input box
-        self.font = pygame.font.Font('pixelFont.ttf', size)
+        self.font = fonts.get(size)
 
     def truncate_input(self):
         # ensures the input text fits within the input box by truncating if necessary
-        while self.font.render(self.input, True, self.color).get_width() > self.max_width:
+        while self.font.size(self.input)[0] > self.max_width:
             self.input = self.input[:-1]
 
     def display(self):
@@ -276,7 +256,7 @@ class Password_Box(Input_Box):
 
     def truncate_input(self):
         # ensure the password stays within the box
-        while self.font.render("*" * len(self.password), True, self.color).get_width() > self.max_width:
+        while self.font.size("*" * len(self.password))[0] > self.max_width:
             self.password = self.password[:-1]
 
     def clear_input(self):
@@ -308,6 +288,13 @@ class Text:
         # starts timer when the subtitle is displayedZ
         self.start_time = pygame.time.get_ticks()
 
+    def time_left(self):
+        # ms until a timed subtitle disappears, None if it isn't counting down
+        if self.start_time is None or self.duration is None:
+            return None
+        left = self.duration - (pygame.time.get_ticks() - self.start_time)
+        return left if left > 0 else None
+
 # OOP BUTTON CLASS - SUBCLASS OF TEXT CLASS (inherits)
 class Button(Text):
     def __init__(self, text, x, y, color, font):
@@ -346,7 +333,9 @@ class Player:
     def __init__(self, x, y, sprite_sheet, scale_factor = 2):
         self.x = x
         self.y = y
-        self.speed = 5
+        self.previous_x = x # position at the start of the tick, for smooth drawing
+        self.previous_y = y
+        self.speed = per_tick(150) # pixels per tick
         self.scale_factor = scale_factor
         self.control_mode = "arrows" # default controls
 
@@ -354,22 +343,16 @@ class Player:
         self.current_hp = self.max_hp
         self.player_level = 3
 
-        # load sprite sheet 
-        self.sprite_sheet = sprite_sheet
+        # sprite sheet path, the sheet itself is loaded the first time it's needed (see load_animations)
+        self.sprite_sheet_path = sprite_sheet
+        self.sprite_sheet = None
         self.width = 32
         self.height = 32
         self.new_width = int(self.width * self.scale_factor)
         self.new_height = int(self.height * self.scale_factor)
 
-        # load animations
-        self.idle_sprite = self.get_sprite(0, 0)
-        self.run_right_frames = [self.get_sprite(i, 0) for i in range(1, 3)] # row 1 / right
-        self.run_left_frames = [pygame.transform.flip(frame, True, False) for frame in self.run_right_frames] # row 2 / flip right to left
-        self.run_down_frames = [self.get_sprite(i, 3) for i in range(4)]  # row 3 / down
-        self.run_up_frames = [self.get_sprite(i, 4) for i in range(4)]  # row 4 / up
-
         # animation settings
-        self.current_animation = [self.idle_sprite]
+        self.current_animation = [] # idle once the animations are loaded
         self.frame_index = 0
         self.animation_speed = 220  # ms per frame
         self.last_update_time = pygame.time.get_ticks()
@@ -377,15 +360,27 @@ class Player:
 
     # SPRITES SETUP
 
+    def load_animations(self):
+        # done the first time the player moves or is drawn rather than at startup
+        if self.sprite_sheet is not None:
+            return
+        self.sprite_sheet = assets.acquire(self.sprite_sheet_path, alpha=True)
+
+        # load animations, shared with anything else using the same sheet (see sprite_atlas.py)
+        self.idle_sprite = self.get_sprite(0, 0)
+        self.run_right_frames = self.get_animation([(i, 0) for i in range(1, 3)]) # row 1 / right
+        self.run_left_frames = self.get_animation([(i, 0) for i in range(1, 3)], flipped=True) # row 2 / flip right to left
+        self.run_down_frames = self.get_animation([(i, 3) for i in range(4)])  # row 3 / down
+        self.run_up_frames = self.get_animation([(i, 4) for i in range(4)])  # row 4 / up
+        self.current_animation = [self.idle_sprite]
+
     # function to extract sprites from sheet and scale
     def get_sprite(self, col, row):
-        # scaling and extracting
-        x = col * self.width
-        y = row * self.height
-        sprite = self.sprite_sheet.subsurface(pygame.Rect(x, y, self.width, self.height))
-        scaled_sprite = pygame.transform.scale(sprite, (self.new_width, self.new_height))
+        # scaled once per sheet and shared between instances
+        return sprite_atlas.frame(self.sprite_sheet, self.width, self.height, self.scale_factor, col, row)
 
-        return scaled_sprite
+    def get_animation(self, cells, flipped=False):
+        return sprite_atlas.animation(self.sprite_sheet, self.width, self.height, self.scale_factor, cells, flipped)
 
         
     def handle_input(self):
@@ -461,20 +456,32 @@ class Player:
 
     def update(self):
         # handles movement and animation update
+        self.previous_x, self.previous_y = self.x, self.y
+        self.load_animations()
         moving = self.handle_input()
         self.update_animation(moving)
 
-    def draw(self, screen):
-            # draw sprite on the screen
+    def draw(self, screen, alpha=1.0):
+            # draw sprite on the screen, alpha of the way from the last tick's position
+            # returns the area drawn over, for the dirty rect renderer
+            self.load_animations()
             if 0 <= self.frame_index < len(self.current_animation):
-                screen.blit(self.current_animation[self.frame_index], (self.x, self.y))
+                return screen.blit(self.current_animation[self.frame_index],
+                            (interpolate(self.previous_x, self.x, alpha), interpolate(self.previous_y, self.y, alpha)))
+
+    def collision_box(self, padding=10):
+        # smaller than the sprite so encounters need a proper overlap, as (x, y, width, height)
+        return (int(self.x + padding), int(self.y + padding),
+                self.new_width - (padding * 2), self.new_height - (padding * 2))
 
 # ENEMY CLASS
 class Enemy:
-    def __init__(self, x, y, sprite_sheet, scale_factor = 2, speed = 3, move_range=(400, 800)):
+    def __init__(self, x, y, sprite_sheet, scale_factor = 2, speed = 90, move_range=(400, 800)):
         self.x = x
         self.y = y
-        self.speed = speed
+        self.previous_x = x # position at the start of the tick, for smooth drawing
+        self.previous_y = y
+        self.speed = per_tick(speed) # pixels per tick, speed is pixels per second
         self.direction = 1  # 1 for right, -1 for left
         self.scale_factor = scale_factor
         self.in_battle = False
@@ -483,35 +490,35 @@ class Enemy:
         self.move_min, self.move_max = move_range
 
  
-        # load sprite sheet
-        self.sprite_sheet = sprite_sheet
+        # sprite sheet path, the sheet itself is loaded the first time it's needed (see load_animations)
+        self.sprite_sheet_path = sprite_sheet
+        self.sprite_sheet = None
         self.width = 64
         self.height = 64
         self.new_width = int(self.width * self.scale_factor)
         self.new_height = int(self.height * self.scale_factor)
 
-        # extract animation frames
-        self.idle_sprite = self.get_sprite(0, 0)
-        self.run_frames = [    
-            self.get_sprite(0, 0),  # 1st frame
-            self.get_sprite(1, 0),  # 2nd frame
-            self.get_sprite(2, 0),  # 3rd frame
-            self.get_sprite(3, 0)   # 4th frame
-        ]
-
         # animation settings
-        self.current_animation = self.run_frames
+        self.current_animation = [] # run frames once the animations are loaded
         self.frame_index = 0
         self.animation_speed = 220  # ms per frame
         self.last_update_time = pygame.time.get_ticks()
 
+    def load_animations(self):
+        # done the first time the enemy moves or is drawn rather than at startup
+        if self.sprite_sheet is not None:
+            return
+        self.sprite_sheet = assets.acquire(self.sprite_sheet_path, alpha=True)
+
+        # extract animation frames, shared by every enemy using this sheet (see sprite_atlas.py)
+        self.idle_sprite = self.get_sprite(0, 0)
+        self.run_frames = sprite_atlas.animation(self.sprite_sheet, self.width, self.height, self.scale_factor,
+                                                 [(i, 0) for i in range(4)]) # 4 frames along row 0
+        self.current_animation = self.run_frames
+
     def get_sprite(self, col, row):
-        # extracts and scales sprite frames from the sprite sheet
-        x = col * self.width
-        y = row * self.height
-        sprite = self.sprite_sheet.subsurface(pygame.Rect(x, y, self.width, self.height))
-        scaled_sprite = pygame.transform.scale(sprite, (self.new_width, self.new_height))
-        return scaled_sprite
+        # extracts and scales sprite frames from the sprite sheet, once per sheet for all enemies
+        return sprite_atlas.frame(self.sprite_sheet, self.width, self.height, self.scale_factor, col, row)
 
     def move(self):
         # moves the enemy in a simple back-and-forth pattern
@@ -527,86 +534,146 @@ class Enemy:
             self.frame_index = (self.frame_index + 1) % len(self.current_animation)
             self.last_update_time = current_time
 
+    def collision_box(self, padding=10):
+        # to make smaller collision rectangles, pixels of padding around sprite
+        return (int(self.x + padding), int(self.y + padding),
+                self.new_width - (padding * 2), self.new_height - (padding * 2))
+
     def check_collision(self, player):
         if self.mercy_shown:
             return False 
-        # to make smaller collision rectangles, pixels of padding around sprite
-        padding = 10 
-
-        # create rectangles for enemy and player for collision detection
-        enemy_rect = pygame.Rect(
-            self.x + padding,
-            self.y + padding,
-            self.new_width - (padding * 2),
-            self.new_height - (padding * 2)
-    )
-            
-        player_rect = pygame.Rect(
-            player.x + padding,
-            player.y + padding,
-            player.new_width - (padding * 2),
-            player.new_height - (padding * 2)
-    )
-
         # checking for collision
-        return enemy_rect.colliderect(player_rect)
+        return rects_overlap(*self.collision_box(), *player.collision_box())
     
         
 
-    def draw(self, screen):
-        # draws the enemy on the screen
+    def draw(self, screen, alpha=1.0):
+        # draws the enemy on the screen, alpha of the way from the last tick's position
+        # returns the area drawn over, for the dirty rect renderer
+        self.load_animations()
         if self.frame_index < len(self.current_animation):
-            screen.blit(self.current_animation[self.frame_index], (self.x, self.y))
-
-    def update(self):
-        # updates movement and animation if not in battle
+            return screen.blit(self.current_animation[self.frame_index],
+                        (interpolate(self.previous_x, self.x, alpha), interpolate(self.previous_y, self.y, alpha)))
+
+    def update(self, steps=1):
+        # updates movement and animation if not in battle, moving steps times this tick
+        # previous position is only saved once so drawing blends across the whole tick's movement
+        self.previous_x, self.previous_y = self.x, self.y
+        self.load_animations()
         if not self.in_battle:
-            self.move()
+            for _ in range(steps):
+                self.move()
             self.update_animation()
         
 # ROOM CLASS
 class Room:
         def __init__(self, background_image, unwalkablle_areas, boundaries):
-            self.background = pygame.image.load(background_image).convert()
+            self.background_path = background_image
+            self.background = None # loaded the first time the room is drawn
+            self.background_size = None # size self.background was scaled to (and is held at)
             self.unwalkable_areas = unwalkablle_areas # list of pygame.Rect obj
             self.boundaries = boundaries # left right top bottom
+            self.grid = None # navigation grid, built the first time it is needed
+            self.flat_grid = None # same grid as a flat bytearray for astar_flat
+            self.grid_version = 0 # goes up when the obstacles change so cached paths are thrown away
+            self.obstacle_index = None # grid hash of the obstacles for check_collision in bigger rooms
 
         def draw(self): # draws bg and collision areas
-            screen.blit(pygame.transform.scale(self.background, (1300, 720)), (0,0))
+            screen.blit(self.get_background(), (0,0))
 
             #for area in self.unwalkable_areas:
              #   pygame.draw.rect(screen, (0, 0, 255), area, 2) 
 
 
+        def get_background(self):
+            # background scaled to the window once, not every frame; the scaled copy is the one
+            # held, so the surface on screen can't be evicted
+            size = screen.get_size()
+            if self.background_size != size:
+                if self.background_size is not None:
+                    assets.release(self.background_path, size=self.background_size)
+                self.background = assets.acquire(self.background_path, size=size)
+                self.background_size = size
+            return self.background
+
         def check_collision(self, new_x, new_y, player_width, player_height): # checks if player collides with obstacles
-            player_rect = pygame.Rect(new_x, new_y, player_width, player_height)
-            for area in self.unwalkable_areas:
-                if player_rect.colliderect(area):
-                    return True 
-            return False
+            if len(self.unwalkable_areas) <= SMALL_ROOM_OBSTACLES:
+                # a handful of rects is quicker to check directly than to look up
+                player_rect = pygame.Rect(new_x, new_y, player_width, player_height)
+                return player_rect.collidelist(self.unwalkable_areas) != -1
+            # the grid hash measured faster per query than the numpy mask (benchmarks/bench_collision.py)
+            return self.get_obstacle_index().collides(new_x, new_y, player_width, player_height)
         
         def check_boundaries(self, player): # making sure player stays in room boundaries
             left, right, top, bottom = current_room.boundaries
             player.x = max(left, min(player.x, right))
             player.y = max(top, min(player.y, bottom))
 
+        def set_unwalkable_areas(self, unwalkable_areas):
+            # replaces the obstacles and throws away the old grid
+            self.unwalkable_areas = unwalkable_areas
+            self.invalidate_grid()
+
+        def invalidate_grid(self):
+            # call this after changing unwalkable_areas in place
+            self.grid = None
+            self.flat_grid = None
+            self.obstacle_index = None
+            self.grid_version += 1
+            path_cache.invalidate_room(self)
+
         def get_grid(self):
-            grid = [[0 for _ in range(GRID_WIDTH)] for _ in range(GRID_HEIGHT)]
-            for y in range(GRID_HEIGHT):
-                for x in range(GRID_WIDTH):
-                    tile_rect = pygame.Rect(x * TILE_SIZE, y * TILE_SIZE, TILE_SIZE, TILE_SIZE)
-                    for obstacle in self.unwalkable_areas:
-                        if tile_rect.colliderect(obstacle):
-                            grid[y][x] = 1  # Mark as wall
-                            break
-            return grid
+            # obstacles don't move so the grid is only built once per room
+            if self.grid is None:
+                self.grid = self.build_grid()
+            return self.grid
+
+        def get_flat_grid(self):
+            if self.flat_grid is None:
+                self.flat_grid = FlatGrid.from_rows(self.get_grid())
+            return self.flat_grid
+
+        def get_obstacle_index(self):
+            if self.obstacle_index is None:
+                self.obstacle_index = StaticGridIndex(self.unwalkable_areas)
+            return self.obstacle_index
+
+        def build_grid(self, tile_size=TILE_SIZE):
+            grid_width = 1300 // tile_size
+            grid_height = 720 // tile_size
+            if HAS_NUMPY:
+                # every obstacle in one vectorised pass
+                return rasterize_tiles(self.unwalkable_areas, grid_width, grid_height, tile_size).astype(int).tolist()
+            # only visits the tiles under each obstacle instead of every tile against every obstacle
+            return build_grid(self.unwalkable_areas, grid_width, grid_height, tile_size)
 
 
 
 
 # BULLET CLASS
+# slotted so the pool below can reuse them cheaply; reset() does the real setting up
 class Bullet:
-    def __init__(self, start_pos, target_pos, grid, speed=2, speed_y=None):
+    __slots__ = ("x", "y", "previous_x", "previous_y", "speed", "speed_y", "mode", "flow_field", "next_tile", "planner", "target_getter",
+                 "target_tile", "current_index", "path_request", "path", "width", "height", "color",
+                 "creation_time", "lifetime")
+
+    def __init__(self, start_pos, target_pos, room, speed=per_tick(60), speed_y=None, flow_field=None, strategy=None,
+                 path_request=None, planner=None, target_getter=None):
+        self.reset(start_pos, target_pos, room, speed, speed_y, flow_field, strategy,
+                   path_request, planner, target_getter)
+
+    def reset(self, start_pos, target_pos, room, speed=per_tick(60), speed_y=None, flow_field=None, strategy=None,
+              path_request=None, planner=None, target_getter=None):
+        # leftovers from the bullet's last life
+        self.flow_field = None
+        self.next_tile = None
+        self.planner = None
+        self.target_getter = None
+        self.target_tile = None
+        self.current_index = 0
+        self.path_request = None
+        self.path = None
+
         # convert positions to pixel coordinates
         if isinstance(start_pos[0], int):  # if already pixel coordinates
             self.x = start_pos[0]
@@ -614,11 +681,29 @@ class Bullet:
         else:  # if grid coordinates
             self.x = start_pos[0] * TILE_SIZE + TILE_SIZE // 2
             self.y = start_pos[1] * TILE_SIZE + TILE_SIZE // 2
+        self.previous_x = self.x
+        self.previous_y = self.y
             
-        self.speed = speed
+        self.speed = speed # pixels per tick
         self.speed_y = speed_y
-        self.mode = "simple" if speed_y else "pathfinding"
-        
+        if speed_y:
+            self.mode = "simple"
+        elif flow_field is not None:
+            self.mode = "homing" # follows the battle's shared flow field towards the heart
+        elif planner is not None:
+            self.mode = "replanning" # asks its planner for the next tile each time it reaches one
+        else:
+            self.mode = "pathfinding"
+
+        if self.mode == "homing":
+            self.flow_field = flow_field
+            self.next_tile = None # tile the bullet is currently heading for
+
+        if self.mode == "replanning":
+            self.planner = planner
+            self.target_getter = target_getter # returns the tile the bullet is chasing
+            self.next_tile = None
+
         if self.mode == "pathfinding":
             # convert to grid coordinates for pathfinding
             start_grid = (start_pos[0] // TILE_SIZE if isinstance(start_pos[0], int) else start_pos[0],
@@ -626,8 +711,15 @@ class Bullet:
             target_grid = (target_pos[0] // TILE_SIZE if isinstance(target_pos[0], int) else target_pos[0],
                           target_pos[1] // TILE_SIZE if isinstance(target_pos[1], int) else target_pos[1])
             
-            self.path = astar_pathfinding(grid, start_grid, target_grid)
+            self.target_tile = target_grid
             self.current_index = 0
+            self.path_request = path_request
+            if path_request is not None:
+                # path is still being worked out on a worker thread, fly straight until it arrives
+                self.path = None
+            else:
+                # only pathfinding bullets need the grid
+                self.path = path_cache.get_path(room, start_grid, target_grid, strategy=strategy)
 
         self.width = 20
         self.height = 20
@@ -636,6 +728,7 @@ class Bullet:
         self.lifetime = 3000
 
     def update(self):
+        self.previous_x, self.previous_y = self.x, self.y
         if pygame.time.get_ticks() - self.creation_time > self.lifetime:
             return "expired"
 
@@ -643,37 +736,125 @@ class Bullet:
             self.y += self.speed_y 
             return "alive"
         
+        if self.mode == "homing" or self.mode == "replanning":
+            if self.next_tile is None:
+                # work out which way to go from the tile the bullet is on
+                current_tile = (int(self.x) // TILE_SIZE, int(self.y) // TILE_SIZE)
+                if self.mode == "homing":
+                    self.next_tile = self.flow_field.next_step(current_tile)
+                else:
+                    # only searches again when the heart has moved to another tile
+                    self.next_tile = self.planner.update(current_tile, self.target_getter())
+                if self.next_tile is None:
+                    return "expired" # reached the heart's tile or can't get there
+
+            if self.move_towards(self.next_tile):
+                self.next_tile = None
+            return "alive"
+
+        if self.mode == "pathfinding" and self.path_request is not None:
+            self.check_path_request()
+
+        if self.mode == "pathfinding" and self.path is None:
+            # straight line fallback while waiting, or if the worker found nothing
+            if self.move_towards(self.target_tile):
+                return "expired"
+            return "alive"
+
         if self.mode == "pathfinding" and self.path:
             if self.current_index >= len(self.path):
                 return "expired"
                 
-            target = self.path[self.current_index]
-            target_x = target[0] * TILE_SIZE + TILE_SIZE // 2
-            target_y = target[1] * TILE_SIZE + TILE_SIZE // 2
-            
-            dx = target_x - self.x
-            dy = target_y - self.y
-            distance = math.sqrt(dx*dx + dy*dy)
-            
-            if distance < self.speed:
-                self.x = target_x
-                self.y = target_y
+            if self.move_towards(self.path[self.current_index]):
                 self.current_index += 1
-            else:
-                self.x += (dx/distance) * self.speed
-                self.y += (dy/distance) * self.speed
             
             return "alive"
         
         return "expired"
 
-    def draw(self, screen):
-        pygame.draw.rect(screen, self.color, (int(self.x), int(self.y), self.width, self.height))
+    def check_path_request(self):
+        # swaps over to the real path once the worker has finished
+        request = self.path_request
+        if not request.done:
+            return
+        self.path_request = None
+        if not request.succeeded() or not request.path:
+            return # keep flying straight
+
+        path_cache.store(request.room, request.start, request.goal, request.strategy,
+                         request.grid_version, request.path)
+        self.path = request.path
+        # carry on from the closest waypoint instead of flying back to the start
+        self.current_index = min(range(len(self.path)), key=lambda i: (
+            (self.path[i][0] * TILE_SIZE + TILE_SIZE // 2 - self.x) ** 2 +
+            (self.path[i][1] * TILE_SIZE + TILE_SIZE // 2 - self.y) ** 2))
+
+    def cancel_path_request(self):
+        if self.mode == "pathfinding" and self.path_request is not None:
+            self.path_request.cancel()
+            self.path_request = None
+
+    def move_towards(self, tile):
+        # moves towards the centre of a tile, returns True once it gets there
+        target_x = tile[0] * TILE_SIZE + TILE_SIZE // 2
+        target_y = tile[1] * TILE_SIZE + TILE_SIZE // 2
+
+        dx = target_x - self.x
+        dy = target_y - self.y
+        distance = math.sqrt(dx*dx + dy*dy)
+
+        if distance < self.speed:
+            self.x = target_x
+            self.y = target_y
+            return True
+
+        self.x += (dx/distance) * self.speed
+        self.y += (dy/distance) * self.speed
+        return False
 
     def check_collision(self, target_rect):
         bullet_rect = pygame.Rect(self.x, self.y, self.width, self.height)
         return bullet_rect.colliderect(target_rect)
 
+    def release(self):
+        # drops everything the bullet points at so a pooled bullet doesn't keep old grids or planners alive
+        self.cancel_path_request()
+        self.flow_field = None
+        self.planner = None
+        self.target_getter = None
+        self.path = None
+
+
+# BULLET POOL CLASS
+# hands out used bullets again instead of making new ones every wave
+class BulletPool:
+    def __init__(self):
+        self.free = []
+        self.in_use = 0
+        self.high_water = 0 # most bullets out at the same time
+        self.allocated = 0 # new Bullet objects made
+        self.reused = 0 # bullets handed out again from the free list
+
+    def acquire(self, *args, **kwargs):
+        if self.free:
+            bullet = self.free.pop()
+            bullet.reset(*args, **kwargs)
+            self.reused += 1
+        else:
+            bullet = Bullet(*args, **kwargs)
+            self.allocated += 1
+        self.in_use += 1
+        self.high_water = max(self.high_water, self.in_use)
+        return bullet
+
+    def release(self, bullet):
+        bullet.release()
+        self.in_use -= 1
+        self.free.append(bullet)
+
+
+bullet_pool = BulletPool()
+
 # BATTLE CLASS
 class Battle:
     def __init__(self, player, enemy, heart_width=20 , heart_height=20):
@@ -701,17 +882,20 @@ class Battle:
         self.box_y = (720 - self.box_height) // 2 - 50
 
         # player and battle movement constraints
-        self.battle_player_speed = 4  # movement speed in battle
+        self.battle_player_speed = per_tick(120)  # movement speed in battle, pixels per tick
 
         # bullet handling
         self.bullets = []
+        # bullets from attack_patterns.py in numpy arrays, None without numpy (then spread uses self.bullets)
+        self.pattern_bullets = BulletArrays() if HAS_NUMPY else None
+        # bullet objects bucketed by position each tick, so only ones near the heart get hit-tested
+        self.bullet_hash = SpatialHash(cell_size=64)
 
         # battle stats
         self.damage_per_hit = 10
         self.player_current_hp = 100
         self.enemy_max_hp = 100 # total hp
         self.enemy_current_hp = 100 # current hp
-        self.butterknife_image = pygame.image.load("butterknife.PNG").convert_alpha() # load butterknife image
         self.butterknife_damage = 10 # damage dealt by butterknife
         self.item_enabled = False # item option starts disabled
         self.has_fought = False # tracks if player has fought at least once
@@ -736,103 +920,107 @@ class Battle:
         self.heart_height = heart_height
         self.battle_player_x = self.box_x + self.box_width // 2 - self.heart_width // 2
         self.battle_player_y = self.box_y + self.box_height // 2 - self.heart_height // 2
+        self.previous_heart_x = self.battle_player_x # heart position at the start of the tick, for smooth drawing
+        self.previous_heart_y = self.battle_player_y
         self.heart_color = red
 
+        # one flow field for every homing bullet, pointing at the heart's tile
+        self.flow_field = FlowField(current_room.get_flat_grid())
+
+        # how each attack's bullets find the heart: "flow_field", "replanning" or a path strategy name (astar/jps/theta)
+        self.attack_strategies = {
+            "targeted": "flow_field", # homing bullets that keep following the heart
+            "ambush": "theta",        # straight any-angle shots from the corners of the box
+            "chase": "replanning",    # one bullet that replans its own route whenever the heart moves
+        }
+        self.path_timeout = 500 # ms a bullet waits for its path before giving up on it
+        # attacks spawn_bullet_wave picks from; the patterns need numpy for their bullets
+        self.attack_types = ["spread", "targeted", "ambush", "chase"]
+        if self.pattern_bullets is not None:
+            self.attack_types += [name for name in ATTACK_PATTERNS if name not in self.attack_types]
+
         # load battle images
         self.load_battle_images()
 
-    def load_battle_images(self):
-        # loads images for player and anemy during battle
-        self.player_battle_image = pygame.image.load("cow_battle.png").convert_alpha()
-        self.enemy_battle_image = pygame.image.load("carrot_battle.png").convert_alpha()
-        self.heart_image = pygame.Surface((self.heart_width, self.heart_height))
-        self.heart_image.fill(self.heart_color)
+        # stats and enemy hp, only redrawn when the numbers change (see hud.py)
+        self.hud = HudLayer([
+            HudWidget((900, 150, 360, 100), self.stats_value, self.draw_stats),
+            HudWidget(((1300 - 400) // 2, 20, 520, 20), self.enemy_hp_value, self.draw_enemy_hp),
+        ])
 
-        try:
-            self.butterknife_image = pygame.image.load("butterknife.PNG").convert_alpha()
-            print("Butterknife image loaded successfully - Dimensions:", 
-                  self.butterknife_image.get_width(), "x",
-                  self.butterknife_image.get_height())
-        except pygame.error as e:
-            print(f"ERROR: Could not load butterknife image: {e}")
-            self.butterknife_image = pygame.Surface((100, 100))
-            self.butterknife_image.fill((255, 0, 0))
-            print("Created placeholder surafce instead")
-
-    def draw(self, screen):
-        # draw battle ui including all elements
-        screen.fill((0, 0, 0))
+    def stats_value(self):
+        return (self.player.player_level, self.player.current_hp, self.player.max_hp)
 
-        # draw bullets
-        for bullet in self.bullets:
-            bullet.draw(screen)
-        
-        # draw player and enemy // left side
-        player_image_x = 100
-        player_image_y = 100
-        enemy_image_x = 100
-        enemy_image_y = 350
-        self.player_battle_image = pygame.transform.scale(self.player_battle_image, (150, 150))
-        self.enemy_battle_image = pygame.transform.scale(self.enemy_battle_image, (150, 150))
-        
-        # draw player stats // right side
-        stats_x = 900
-        stats_y = 150
-        
-        # draw LV and HP
-        lv_text = pygame.font.Font('pixelFont.ttf', 50).render(f"LV {self.player.player_level}", True, white)
-        hp_text = pygame.font.Font('pixelFont.ttf', 50).render("HP", True, white)
-        
-        screen.blit(lv_text, (stats_x, stats_y))
-        screen.blit(hp_text, (stats_x, stats_y + 50))
-        
-        # draw HP bar
+    def enemy_hp_value(self):
+        return (self.enemy_current_hp, self.enemy_max_hp)
+
+    def draw_stats(self, surface, value):
+        # LV, HP bar and HP numbers, drawn relative to the top left of the stats area
+        level, current_hp, max_hp = value
+        surface.blit(text_cache.render(f"LV {level}", 50, white), (0, 0))
+        surface.blit(text_cache.render("HP", 50, white), (0, 50))
+
+        # HP bar background, then current HP over it
         hp_bar_width = 150
         hp_bar_height = 20
-        hp_bar_x = stats_x + 60
-        hp_bar_y = stats_y + 50
+        hp_bar_x = 60
+        hp_bar_y = 50
+        pygame.draw.rect(surface, (255, 0, 0), (hp_bar_x, hp_bar_y, hp_bar_width, hp_bar_height))
+        current_hp_width = (current_hp / max_hp) * hp_bar_width
+        pygame.draw.rect(surface, (255, 255, 0), (hp_bar_x, hp_bar_y, current_hp_width, hp_bar_height))
+
+        surface.blit(text_cache.render(f"{current_hp}/{max_hp}", 30, white), (hp_bar_x + hp_bar_width + 20, hp_bar_y))
 
+    def draw_enemy_hp(self, surface, value):
+        # enemy HP bar across the top with the numbers after it
+        enemy_current_hp, enemy_max_hp = value
         enemy_hp_bar_width = 400
         enemy_hp_bar_height = 20
-        enemy_hp_bar_x = (1300 - enemy_hp_bar_width) // 2
-        enemy_hp_bar_y = 20
-
-        # draw enemy HP bar background
-        pygame.draw.rect(screen, (128, 128, 128), (enemy_hp_bar_x, enemy_hp_bar_y, enemy_hp_bar_width, enemy_hp_bar_height))
+        pygame.draw.rect(surface, (128, 128, 128), (0, 0, enemy_hp_bar_width, enemy_hp_bar_height))
+        current_enemy_hp_width = (enemy_current_hp / enemy_max_hp) * enemy_hp_bar_width
+        pygame.draw.rect(surface, (255, 0, 0), (0, 0, current_enemy_hp_width, enemy_hp_bar_height))
+        surface.blit(text_cache.render(f"{enemy_current_hp}/{enemy_max_hp}", 20, white), (enemy_hp_bar_width + 10, 0))
 
-        # draw current enemy HP
-        current_enemy_hp_width = (self.enemy_current_hp / self.enemy_max_hp) * enemy_hp_bar_width
-        pygame.draw.rect(screen, (255, 0, 0), (enemy_hp_bar_x, enemy_hp_bar_y, current_enemy_hp_width, enemy_hp_bar_height))
+    def load_battle_images(self):
+        # loads images for player and anemy during battle, already scaled to how they're drawn (see battle_assets.py)
+        self.battle_assets = BattleAssets()
+        self.player_battle_image = self.battle_assets.player_portrait
+        self.enemy_battle_image = self.battle_assets.enemy_portrait
+        self.butterknife_image = self.battle_assets.butterknife
+        self.heart_image = bullet_sprites.get(self.heart_width, self.heart_height, self.heart_color)[0]
+
+    def release_assets(self):
+        # lets the asset manager drop this battle's images once no other battle uses them
+        self.battle_assets.release()
+
+    def draw(self, screen, alpha=1.0):
+        # draw battle ui including all elements
+        # alpha is how far we are between the last tick and the next one (see game_clock.py)
+        screen.fill((0, 0, 0))
 
-        # draw enemy HP numbers
-        enemy_hp_numbers = pygame.font.Font('pixelFont.ttf', 20).render(f"{self.enemy_current_hp}/{self.enemy_max_hp}", True, white)
-        screen.blit(enemy_hp_numbers, (enemy_hp_bar_x + enemy_hp_bar_width + 10, enemy_hp_bar_y))
+        # draw bullets, one blits call per bullet look
+        bullet_sprites.draw_bullets(screen, self.bullets, alpha)
+        if self.pattern_bullets is not None:
+            bullet_xs, bullet_ys = self.pattern_bullets.positions(pygame.time.get_ticks())
+            bullet_sprites.draw(screen, zip(bullet_xs.tolist(), bullet_ys.tolist()),
+                                self.pattern_bullets.width, self.pattern_bullets.height, white)
         
-        # draw HP bar background
-        pygame.draw.rect(screen, (255, 0, 0), (hp_bar_x, hp_bar_y, hp_bar_width, hp_bar_height))
+        # draw player and enemy // left side
+        player_image_x = 100
+        player_image_y = 100
+        enemy_image_x = 100
+        enemy_image_y = 350
         
-        # draw current HP
-        current_hp_width = (self.player.current_hp / self.player.max_hp) * hp_bar_width
-        pygame.draw.rect(screen, (255, 255, 0), (hp_bar_x, hp_bar_y, current_hp_width, hp_bar_height))
-
-        # draw HP numbers
-        hp_numbers = pygame.font.Font('pixelFont.ttf', 30).render(f"{self.player.current_hp}/{self.player.max_hp}", True, white)
-        screen.blit(hp_numbers, (hp_bar_x + hp_bar_width + 20, hp_bar_y))
+        # draw player stats // right side and enemy HP // top, one blit of the HUD overlay
+        self.hud.draw(screen)
         
         # draw butterknife image if ITEM is selected
         if self.state == "ITEM":
             butterknife_x = 1000
             butterknife_y = 400
-            screen.blit(self.butterknife_image, (butterknife_x, butterknife_y))
 
             pygame.draw.rect(screen, (255, 0, 0), (butterknife_x, butterknife_y, 100, 100), 2)
-
-            try:
-                # Scale the image if needed
-                scaled_knife = pygame.transform.scale(self.butterknife_image, (100, 100))
-                screen.blit(scaled_knife, (butterknife_x, butterknife_y))
-            except:
-                print("Failed to draw butterknife")  # debug
+            screen.blit(self.butterknife_image, (butterknife_x, butterknife_y)) # already 100x100
 
         # disable ITEM option if not available
         if not self.item_enabled:
@@ -857,7 +1045,8 @@ class Battle:
             pygame.draw.rect(screen, white, (dodge_box_x, dodge_box_y, dodge_box_width, dodge_box_height), 4)
 
             # draw heart inside dodging area
-            pygame.draw.rect(screen, self.heart_color, (self.battle_player_x, self.battle_player_y, self.heart_width, self.heart_height))
+            screen.blit(self.heart_image, (interpolate(self.previous_heart_x, self.battle_player_x, alpha),
+                                           interpolate(self.previous_heart_y, self.battle_player_y, alpha)))
 
         else:
             # default small battle box
@@ -893,14 +1082,8 @@ class Battle:
             border_color = yellow if option["selected"] else default_color # highlights if chosen
 
             
-            # draw option background and border
-            pygame.draw.rect(screen, (0, 0, 0), (option_x, option_y, option_width, option_height), border_radius=20) 
-            pygame.draw.rect(screen, border_color, (option_x, option_y, option_width, option_height), 5, border_radius=20)
-
-            # draw option text
-            option_text = button_font.render(option['text'], True, option['color'])
-            option_text_rect = option_text.get_rect(center=(option_x + option_width // 2, option_y + option_height // 2))
-            screen.blit(option_text, option_text_rect)
+            # draw option background, border and text, built once per look
+            screen.blit(get_button(option['text'], option['color'], border_color), (option_x, option_y))
             
            
         # draw battle message if any
@@ -913,7 +1096,7 @@ class Battle:
 
             # if the message is still within the display duration then render it
             if current_time - self.message_timer < self.message_duration:
-                message_text = box_subtitle_font.render(self.message, True, white)  # render message text
+                message_text = text_cache.render(self.message, 30, white)  # render message text
                 message_x = self.box_x + self.box_width // 2  # center x pos
                 message_y = self.box_y - 40  # position message slightly above the battle box
                 message_rect = message_text.get_rect(center=(message_x, message_y))  # align the text
@@ -925,7 +1108,7 @@ class Battle:
                 self.message_timer = None  # reset timer for future messages
         
         if self.mercy_message and self.mercy_timer:
-            mercy_text = box_subtitle_font.render(self.mercy_message, True, white)
+            mercy_text = text_cache.render(self.mercy_message, 30, white)
             # position mercy message in center of battle box
             mercy_rect = mercy_text.get_rect(center=(
                 self.box_x + self.box_width // 2,
@@ -1001,8 +1184,8 @@ class Battle:
 
                 elif event.key == pygame.K_ESCAPE:
                     # return to game
-                    global current_screen
-                    current_screen = "start_game"
+                    scenes.go_to("start_game")
+                    self.clear_bullets()
                     self.enemy.in_battle = False  
 
     def user_item(self):
@@ -1017,6 +1200,7 @@ class Battle:
         self.item_timer = pygame.time.get_ticks()
 
     def handle_dodging_input(self):
+        self.previous_heart_x, self.previous_heart_y = self.battle_player_x, self.battle_player_y
         keys = pygame.key.get_pressed()
         if keys[pygame.K_LEFT] or keys[pygame.K_a]:
             self.battle_player_x -= self.battle_player_speed
@@ -1036,9 +1220,17 @@ class Battle:
         self.battle_player_x = max(dodge_box_x, min(self.battle_player_x, dodge_box_x + dodge_box_width - self.heart_width))
         self.battle_player_y = max(dodge_box_y, min(self.battle_player_y, dodge_box_y + dodge_box_height - self.heart_height))
 
+    def get_heart_tile(self):
+        # the heart's position on the room grid
+        return (int((self.battle_player_x - current_room.boundaries[0]) // TILE_SIZE),
+                int((self.battle_player_y - current_room.boundaries[2]) // TILE_SIZE))
+
+    def update_flow_field(self):
+        # rebuilds at most once per tick, and only when the heart has changed tile
+        self.flow_field.update(current_room.get_flat_grid(), self.get_heart_tile())
+
     def update(self):
         current_time = pygame.time.get_ticks()
-        global current_screen
         
         if self.state == "DODGING":
             # inititialise dodging timer if first frame
@@ -1048,13 +1240,14 @@ class Battle:
                 self.spawn_bullet_wave()  # first wave immediately
                 
             self.handle_dodging_input()
+            self.update_flow_field()
             elapsed_time = current_time - self.dodging_timer
             
             # end dodging phase after duration
             if elapsed_time >= self.dodging_duration:
                 self.state = "SELECTING"
                 self.turn = "PLAYER"
-                self.bullets.clear()
+                self.clear_bullets()
                 self.dodging_timer = None
             # spawn new wave every 800ms (instead of 2000ms)
             elif current_time - self.last_wave_time > 800:  # faster wave frequency
@@ -1075,29 +1268,59 @@ class Battle:
                 update_player_room(current_username, "room2")  # store current room
 
                 # return to game
-                current_screen = "start_game"
+                scenes.go_to("start_game")
+                self.clear_bullets()
                 current_room_name = [name for name, room in rooms.items() if room == current_room][0]
                 switch_room(current_room_name)
 
                 return
             
             # update and check all bullets
-            for bullet in self.bullets[:]:  # use copy for safe removal
-                status = bullet.update()
+            player_rect = pygame.Rect(self.battle_player_x, self.battle_player_y, 
+                                    self.heart_width, self.heart_height)
+            # survivors are packed to the front of the list as we go, then the tail is cut off once
+            bullets = self.bullets
+            statuses = [bullet.update() for bullet in bullets]
+
+            # broadphase: bucket the bullets, then only the ones sharing a cell with the heart are tested
+            self.bullet_hash.clear()
+            for bullet in bullets:
+                self.bullet_hash.insert(bullet, bullet.x, bullet.y, bullet.width, bullet.height)
+            near_heart = self.bullet_hash.query(*player_rect)
+
+            kept = 0
+            for index in range(len(bullets)):
+                bullet = bullets[index]
+                status = statuses[index]
                 
                 # check if bullet hit player or expired
-                player_rect = pygame.Rect(self.battle_player_x, self.battle_player_y, 
-                                        self.heart_width, self.heart_height)
-                if bullet.check_collision(player_rect):
+                if bullet in near_heart and bullet.check_collision(player_rect):
                     self.player.current_hp -= self.damage_per_hit
-                    self.bullets.remove(bullet)
+                    bullet_pool.release(bullet)
                     
                     if self.player.current_hp <= 0:
                         self.player.current_hp = 0
                         self.game_over = True
+                        del bullets[kept:index + 1] # already released or moved forward
+                        self.clear_bullets()
                         return
                 elif status == "expired":
-                    self.bullets.remove(bullet)
+                    bullet_pool.release(bullet)
+                else:
+                    bullets[kept] = bullet
+                    kept += 1
+            del bullets[kept:]
+
+            # all the pattern bullets move and hit-test at once
+            if self.pattern_bullets is not None:
+                hits = self.pattern_bullets.update(current_time, player_rect)
+                for _ in range(hits):
+                    self.player.current_hp -= self.damage_per_hit
+                    if self.player.current_hp <= 0:
+                        self.player.current_hp = 0
+                        self.game_over = True
+                        self.clear_bullets()
+                        return
         
         elif self.state == "ITEM" and self.item_timer:
             if current_time - self.item_timer > self.item_duration:
@@ -1113,7 +1336,7 @@ class Battle:
                     self.mercy_timer = None
                 elif self.mercy_count >= 2 and self.mercy_shown:
                     # exit battle after second mercy
-                    current_screen = "start_game"
+                    scenes.go_to("start_game")
                     self.enemy.mercy_shown = True
                     # mark enemy so it won't battle again
                     self.enemy.in_battle = True
@@ -1123,7 +1346,6 @@ class Battle:
                     # get the current room name from the rooms dictionary
                     
                     # return to game
-                    current_screen = "start_game"
                     current_room_name = [name for name, room in rooms.items() if room == current_room][0]
                     switch_room(current_room_name)
                     player.x = 600
@@ -1131,26 +1353,83 @@ class Battle:
 
     
     
+    def spawn_path_bullet(self, start_tile, attack_type, speed=90):
+        # spawns a bullet on start_tile that heads for the heart using the attack's strategy
+        # returns False (and spawns nothing) if the heart can't be reached from there
+        # speed is pixels per second
+        strategy_name = self.attack_strategies[attack_type]
+        speed = per_tick(speed)
+        heart_tile = self.get_heart_tile()
+        # Bullet treats int positions as pixels, so pass tile centres
+        start_pixels = (start_tile[0] * TILE_SIZE + TILE_SIZE // 2, start_tile[1] * TILE_SIZE + TILE_SIZE // 2)
+        heart_pixels = (heart_tile[0] * TILE_SIZE + TILE_SIZE // 2, heart_tile[1] * TILE_SIZE + TILE_SIZE // 2)
+
+        if strategy_name == "flow_field":
+            # the flow field already knows if the heart can be reached from here
+            if not self.flow_field.distance_at(start_tile):
+                return False
+            self.bullets.append(bullet_pool.acquire(start_pixels, heart_pixels, current_room, speed=speed,
+                                       flow_field=self.flow_field))
+            return True
+
+        if strategy_name == "replanning":
+            # a fresh astar_flat (through the path cache) each time the heart changes tile; D* Lite
+            # (dstar_lite.py) expands fewer nodes but is slower here, see benchmarks/bench_pathfinding.py
+            planner = PathReplanner(path_cache, current_room)
+            if planner.update(start_tile, heart_tile) is None:
+                return False
+            self.bullets.append(bullet_pool.acquire(start_pixels, heart_pixels, current_room, speed=speed,
+                                       planner=planner, target_getter=self.get_heart_tile))
+            return True
+
+        strategy = get_path_strategy(strategy_name)
+        cached_path = path_cache.lookup(current_room, start_tile, heart_tile, strategy)
+        if cached_path is not None:
+            if not cached_path:
+                return False # already know the heart can't be reached from here
+            self.bullets.append(bullet_pool.acquire(start_pixels, heart_pixels, current_room, speed=speed,
+                                       strategy=strategy))
+            return True
+
+        # not searched yet: spawn now and let a worker thread find the path
+        path_request = path_workers.request(current_room, start_tile, heart_tile, strategy,
+                                            timeout_ms=self.path_timeout)
+        self.bullets.append(bullet_pool.acquire(start_pixels, heart_pixels, current_room, speed=speed,
+                                   strategy=strategy, path_request=path_request))
+        return True
+
+    def clear_bullets(self):
+        # removes every bullet, cancels any path searches they were still waiting on and returns them to the pool
+        for bullet in self.bullets:
+            bullet_pool.release(bullet)
+        self.bullets.clear()
+        if self.pattern_bullets is not None:
+            self.pattern_bullets.clear()
+
     def spawn_bullet_wave(self):
-        attack_type = random.choice(["spread", "targeted"])
-            
-        if attack_type == "spread":
+        attack_type = random.choice(self.attack_types)
+
+        if attack_type in ATTACK_PATTERNS and self.pattern_bullets is not None:
+            box = (self.box_x, self.box_y, self.box_width, self.box_height)
+            spawn_pattern(self.pattern_bullets, attack_type, pygame.time.get_ticks(), box,
+                          (self.battle_player_x, self.battle_player_y), random)
+
+        elif attack_type == "spread":
             wave_size = random.randint(3, 5)
             for i in range(wave_size):
                 # spawn bullets at top of battle box (not screen top)
                 x = random.randint(self.box_x + 20, self.box_x + self.box_width - 20)  # within box width
                 y = self.box_y - 30  # top of the battle box
-                self.bullets.append(Bullet(
+                self.bullets.append(bullet_pool.acquire(
                     (x, y),  # start position (pixels)
                     (0, 0),  # dummy target
-                    current_room.get_grid(),
-                    speed_y=random.uniform(4, 8)  # faster vertical speed
+                    current_room,
+                    speed_y=per_tick(random.uniform(120, 240))  # faster vertical speed
                 ))
         
         elif attack_type == "targeted":
             # lock onto current player position in grid
-            player_grid_x = int((self.battle_player_x - current_room.boundaries[0]) // TILE_SIZE)
-            player_grid_y = int((self.battle_player_y - current_room.boundaries[2]) // TILE_SIZE)
+            self.update_flow_field()
 
             # spawn from tiles near the top of the box
             for dx in range(-2, 3):  # try several x around player
@@ -1160,18 +1439,28 @@ class Battle:
                 start_grid_y = int((start_y - current_room.boundaries[2]) // TILE_SIZE)
 
                 if 0 <= start_grid_x < GRID_WIDTH and 0 <= start_grid_y < GRID_HEIGHT:
-                    path = astar_pathfinding(current_room.get_grid(), 
-                                            (start_grid_x, start_grid_y), 
-                                            (player_grid_x, player_grid_y))
-                    if path:
-                        self.bullets.append(Bullet(
-                            (start_grid_x, start_grid_y),     # spawn near top
-                            (player_grid_x, player_grid_y),   # path to where player *was*
-                            current_room.get_grid(),
-                            speed=3
-                        ))
+                    if self.spawn_path_bullet((start_grid_x, start_grid_y), attack_type):
                         break  # spawn only one per wave for now
 
+        elif attack_type == "ambush":
+            self.update_flow_field()
+
+            # one shot from each top corner of the dodging box
+            dodge_box_left = self.box_x - 50
+            dodge_box_right = self.box_x + self.box_width + 50
+            corner_y = int((self.box_y - 50 - current_room.boundaries[2]) // TILE_SIZE)
+            for corner_x in (dodge_box_left, dodge_box_right):
+                start_grid_x = int((corner_x - current_room.boundaries[0]) // TILE_SIZE)
+                if 0 <= start_grid_x < GRID_WIDTH and 0 <= corner_y < GRID_HEIGHT:
+                    self.spawn_path_bullet((start_grid_x, corner_y), attack_type)
+
+        elif attack_type == "chase":
+            # comes up from below the dodging box, under the heart
+            start_grid_x = int((self.battle_player_x - current_room.boundaries[0]) // TILE_SIZE)
+            start_grid_y = int((self.box_y + self.box_height + 50 - current_room.boundaries[2]) // TILE_SIZE)
+            if 0 <= start_grid_x < GRID_WIDTH and 0 <= start_grid_y < GRID_HEIGHT:
+                self.spawn_path_bullet((start_grid_x, start_grid_y), attack_type, speed=60)
+
 
 
 # input boxes and subtitles
@@ -1217,15 +1506,12 @@ game_over_text = Text('GAME OVER', 650, 200, red, subtitle_font)
 retry_button = Button('RETRY', 650, 400, orange, button_font)
 
 # INITIALISING PLAYER/ENEMY
-sprite_sheet = pygame.image.load("cows_spritesheet_white_pinkspots.png").convert_alpha()
-enemy_sprite_sheet = pygame.image.load("Carrot-sheet.png").convert_alpha()
+sprite_sheet = "cows_spritesheet_white_pinkspots.png" # loaded by the asset manager when first drawn
+enemy_sprite_sheet = "Carrot-sheet.png"
 # CREATING PLAYER/ENEMY INSTANCE
 player = Player(600, 400, sprite_sheet)
 enemy = Enemy(500, 300, enemy_sprite_sheet)
 
-# load battle images
-player_battle_image = pygame.image.load("cow_battle.png").convert_alpha()  
-enemy_battle_image = pygame.image.load("carrot_battle.png").convert_alpha()  
 soul_image = pygame.Surface((20, 20))
 soul_image.fill(red)
 
@@ -1233,40 +1519,19 @@ soul_image.fill(red)
 # INSTANTIATING ROOMS
 room1 = Room (
     "room1.png", # background
-    [ 
-    pygame.Rect(50, 300, 1300, 100),
-    pygame.Rect(10, 300, 20, 400),
-    pygame.Rect(1200, 400, 200, 95),
-    pygame.Rect(1200, 598, 200, 95),
-    pygame.Rect(400, 598, 55, 95),
-    pygame.Rect(400, 390, 55, 95),
-    pygame.Rect(825, 598, 55, 95),
-    pygame.Rect(825, 390, 55, 95),
-    pygame.Rect(50, 665, 1300, 100) # obstacles 
-    ],
+    [pygame.Rect(area) for area in ROOM_OBSTACLES["room1"]], # obstacles
     (0, 1300 - player.new_width, 0, 720 - player.new_height) # boundaries
 )
 
 room2 = Room(
     "room2.png",  # background
-    [   # define obstacles for room2
-        pygame.Rect(50, 150, 1300, 100),
-        pygame.Rect(10, 300, 45, 400),
-        pygame.Rect(1200, 450, 200, 150),
-        pygame.Rect(1200, 250, 200, 95),
-        pygame.Rect(90, 598, 1300, 95),
-        pygame.Rect(80, 370, 240, 300),
-    ],
+    [pygame.Rect(area) for area in ROOM_OBSTACLES["room2"]],  # obstacles for room2
     (0, 1300 - player.new_width, 0, 720 - player.new_height)  # boundaries
 )
 
 room3 = Room(
     "room3.png", # background
-    [
-        pygame.Rect(0, 200, 1300, 100),   # top wall
-        pygame.Rect(0, 550, 1300, 100),   # bottom wall
-        pygame.Rect(1260, 470, 70, 200),  # column on right
-    ],
+    [pygame.Rect(area) for area in ROOM_OBSTACLES["room3"]],
     (0, 1300 - player.new_width, 0, 720 - player.new_height)
 )
 
@@ -1275,6 +1540,8 @@ enemy2 = Enemy(650, 300, enemy_sprite_sheet, move_range=(600, 700))   # 1/2 of w
 enemy3 = Enemy(1000, 300, enemy_sprite_sheet, move_range=(950, 1100)) # 3/4 of width
 
 room3_enemies = [enemy1, enemy2, enemy3]
+# overworld entities bucketed by position each frame, so encounters are only checked for things close by
+entity_hash = SpatialHash(cell_size=128)
 
 
 rooms = {
@@ -1285,38 +1552,124 @@ rooms = {
 
 current_room = rooms["room1"]
 
-
 # screen control
-current_screen = "main_menu"
-
-
+# every screen is a Scene (see scenes.py); the buttons and boxes above are shared between them
+current_battle = None # battle in progress, kept between fights in room2 until a game over
+
+def set_current_battle(battle):
+    # replaces the battle in progress, letting go of the old one's images
+    global current_battle
+    if current_battle is not None:
+        current_battle.release_assets()
+    current_battle = battle
+# overworld only redraws what moved, set to False to redraw and flip the whole screen every frame
+DIRTY_RECT_RENDERING = True
+overworld_renderer = DirtyRenderer(screen)
+
+def draw_level_label(surface, level):
+    # player level, right aligned so it stays inside the top right corner
+    level_display = text_cache.render(f"LV {level}", 30, white)
+    surface.blit(level_display, level_display.get_rect(topright=(surface.get_width(), 0)))
+
+# player level top right in the overworld, only re-rendered when it changes
+overworld_hud = HudLayer([HudWidget((1130, 10, 150, 27), lambda: player.player_level, draw_level_label)])
+
+
+def show_error(message):
+    # shows a feedback message at the top of the login screens for error_duration ms
+    global error_message, error_display_end_time
+    error_message = message
+    error_display_end_time = pygame.time.get_ticks() + error_duration
+    print(message)
+
+
+def draw_error_message():
+    # display the feedback message if still active
+    global error_message
+    current_time = pygame.time.get_ticks()
+    if error_message and current_time < error_display_end_time:
+        message_surf = text_cache.render(error_message, 80, blue)
+        message_rect = message_surf.get_rect(center=(650, 100))  # Adjust position as needed
+        screen.blit(message_surf, message_rect)
+    elif current_time >= error_display_end_time:
+        error_message = ""
+
+
+def error_time_left():
+    # ms until the feedback message disappears, None if there isn't one
+    if not error_message:
+        return None
+    return max(1, error_display_end_time - pygame.time.get_ticks())
+
+
+# MAIN MENU SCENE
+class MainMenuScene(Scene):
+    idle = True
 
-
-
-while True:
-    if current_screen == "main_menu":
+    def handle_event(self, event):
+        if exit_button.check_if_clicked(event):
+            pygame.quit()
+            exit()
+        if login_button.check_if_clicked(event):
+            scenes.push("login")
+        if controls_button.check_if_clicked(event):
+            scenes.push("controls")
+
+    def draw(self, alpha):
         screen.blit(background_image, (0, 0))
         login_button.draw()
         controls_button.draw()
         exit_button.draw()  # drawing display MAIN MENU
 
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                exit()
-            if exit_button.check_if_clicked(event):
-                pygame.quit()
-                exit()
-            if login_button.check_if_clicked(event):
-                current_screen = "login"
-                username_box.clear_input()
-                password_box.clear_input()  # clears boxes so the user can login without having to delete previous entries
-            if controls_button.check_if_clicked(event):
-                current_screen = "controls"
-
-        pygame.display.update()
-
-    elif current_screen == "login":
+
+# LOGIN SCENE
+class LoginScene(Scene):
+    idle = True
+
+    def enter(self):
+        # clears boxes so the user can login without having to delete previous entries
+        username_box.clear_input()
+        password_box.clear_input()
+
+    def next_timer(self):
+        return error_time_left()
+
+    def handle_event(self, event):
+        if create_account_button.check_if_clicked(event):
+            scenes.push("create_account")
+        username_box.handle_event(event)
+        password_box.handle_event(event) # handling submissions by taking input and clearing boxes for the user so that they can then login
+
+        # back button Logic
+        if back_button.check_if_clicked(event):
+            scenes.go_to("main_menu")
+
+        # submit button Logic
+        if submit_button.check_if_clicked(event):
+            username = username_box.input.strip()
+            password = password_box.password.strip()
+
+            if not username: # input validation - presence check
+                show_error("Username cannot be empty!")
+            elif not password:
+                show_error("Password cannot be empty!") # presence check
+            elif not username_exists(username):
+                show_error("Username does not exist!") # checks if existing account is in database
+            elif not verify_user(username, password): # checks for correct password
+                show_error("Incorrect password!")
+            else:
+                global error_message, error_display_end_time
+                error_message = "Login Successful!" # successful login
+                error_display_end_time = pygame.time.get_ticks() + error_duration
+                print(f"Login successful: USERNAME: {username}")
+                scenes.reset("start_game")
+                saved_room = get_saved_room(username)
+                switch_room(saved_room)
+                player.x = 600
+                player.y = 500
+                player.player_level = get_player_level(username)
+
+    def draw(self, alpha):
         screen.blit(background_image, (0, 0))
         login_subtitle.draw()
         create_account_button.draw()
@@ -1326,68 +1679,70 @@ while True:
         password_subtitle.draw()
         submit_button.draw()
         back_button.draw() # drawing display
+        draw_error_message()
 
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                exit()
-            if create_account_button.check_if_clicked(event):
-                current_screen = "create_account"
-                username_box.clear_input()
-                password_box.clear_input()
-                passwordcheck_box.clear_input()
-            username_box.handle_event(event)
-            password_box.handle_event(event) # handling submissions by taking input and clearing boxes for the user so that they can then login
-
-            # back button Logic
-            if back_button.check_if_clicked(event):
-                current_screen = "main_menu"
-
-            # submit button Logic
-            if submit_button.check_if_clicked(event):
-                username = username_box.input.strip()
-                password = password_box.password.strip()
-
-                if not username: # input validation - presence check
-                    error_message = "Username cannot be empty!"
-                    error_display_end_time = pygame.time.get_ticks() + error_duration
-                    print("Username cannot be empty!")
-                elif not password:
-                    error_message = "Password cannot be empty!" # presence check
-                    error_display_end_time = pygame.time.get_ticks() + error_duration
-                    print("Password cannot be empty!")
-                elif not username_exists(username):
-                    error_message = "Username does not exist!" # checks if existing account is in database
-                    error_display_end_time = pygame.time.get_ticks() + error_duration
-                    print("Username does not exist!")
-                elif not verify_user(username, password): # checks for correct password
-                    error_message = "Incorrect password!"
-                    error_display_end_time = pygame.time.get_ticks() + error_duration
-                    print("Incorrect password!")
-                else:
-                    error_message = "Login Successful!" # successful login
-                    error_display_end_time = pygame.time.get_ticks() + error_duration
-                    print(f"Login successful: USERNAME: {username}")
-                    current_screen = "start_game"
-                    saved_room = get_saved_room(username)
-                    switch_room(saved_room)
-                    player.x = 600
-                    player.y = 500
-                    player.player_level = get_player_level(username)
-                    
 
-        # display the feedback message if still active
-        current_time = pygame.time.get_ticks()
-        if error_message and current_time < error_display_end_time:
-            message_surf = subtitle_font.render(error_message, True, blue)
-            message_rect = message_surf.get_rect(center=(650, 100))  # Adjust position as needed
-            screen.blit(message_surf, message_rect)
-        elif current_time >= error_display_end_time:
-            error_message = ""
+# CREATE ACCOUNT SCENE
+class CreateAccountScene(Scene):
+    idle = True
+
+    def enter(self):
+        username_box.clear_input()
+        password_box.clear_input()
+        passwordcheck_box.clear_input()
 
-        pygame.display.update()
+    def next_timer(self):
+        return error_time_left()
 
-    elif current_screen == "create_account":
+    def handle_event(self, event):
+        # back button logic
+        if back_button.check_if_clicked(event):
+            scenes.go_to("login")
+
+        username_box.handle_event(event)
+        password_box.handle_event(event)
+        passwordcheck_box.handle_event(event)
+
+        # submit button logic
+        if submit_button.check_if_clicked(event):
+            username = username_box.input.strip()
+            password = password_box.password.strip()
+            confirm_password = passwordcheck_box.password.strip()
+
+            if not username:
+                show_error("Username cannot be empty!")
+            elif username_exists(username):
+                show_error("Username already exists!")
+            elif not password:
+                show_error("Password cannot be empty!")
+            elif len(password) < 8:
+                show_error("Password must be at least 8 characters long!")
+            elif password != confirm_password: # checks if the two inputted passwords match
+                show_error("Passwords do not match!")
+            else:
+                try:
+                    # hashing password before storing
+                    hashed_password = hashing(password)
+
+                    # inserting data into the database
+                    conn = sqlite3.connect("UDD_database.db")
+                    cur = conn.cursor()
+                    cur.execute(
+                        '''
+                        INSERT INTO TBL_Player (username, password, room_num)
+                        VALUES (?, ?, ?)
+                        ''',
+                        (username, hashed_password, 0)  # placeholder for room number
+                    )
+                    conn.commit()
+                    conn.close()
+
+                    print(f"Account created successfully: USERNAME: {username}, PASSWORD: {password}")
+                    scenes.go_to("login")
+                except sqlite3.IntegrityError:
+                    show_error("Username already exists!")
+
+    def draw(self, alpha):
         screen.blit(background_image, (0, 0))
         create_account_subtitle.draw()
         username_box.display()
@@ -1398,150 +1753,103 @@ while True:
         confirm_password_subtitle.draw()
         submit_button.draw()
         back_button.draw() # draws display
+        draw_error_message()
 
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                exit()
-
-            # back button logic
-            if back_button.check_if_clicked(event):
-                current_screen = "login"
-                username_box.clear_input()
-                password_box.clear_input()
-                passwordcheck_box.clear_input()
-
-            username_box.handle_event(event)
-            password_box.handle_event(event)
-            passwordcheck_box.handle_event(event)
-
-            # submit button logic
-            if submit_button.check_if_clicked(event):
-                username = username_box.input.strip()
-                password = password_box.password.strip()
-                confirm_password = passwordcheck_box.password.strip()
-
-                if not username:
-                    error_message = "Username cannot be empty!"
-                    error_display_end_time = pygame.time.get_ticks() + error_duration
-                    print("Username cannot be empty!")
-                elif username_exists(username):
-                    error_message = "Username already exists!"
-                    error_display_end_time = pygame.time.get_ticks() + error_duration
-                    print("Error: Username already exists!")
-                elif not password:
-                    error_message = "Password cannot be empty!"
-                    error_display_end_time = pygame.time.get_ticks() + error_duration
-                    print("Password cannot be empty!")
-                elif len(password) < 8:
-                    error_message = "Password must be at least 8 characters long!"
-                    error_display_end_time = pygame.time.get_ticks() + error_duration
-                    print("Password must be at least 8 characters long!")
-                elif password != confirm_password: # checks if the two inputted passwords match
-                    error_message = "Passwords do not match!"
-                    error_display_end_time = pygame.time.get_ticks() + error_duration
-                    print("Passwords do not match!")
-                else:
-                    try:
-                        # hashing password before storing
-                        hashed_password = hashing(password)
-
-                        # inserting data into the database
-                        conn = sqlite3.connect("UDD_database.db")
-                        cur = conn.cursor()
-                        cur.execute(
-                            '''
-                            INSERT INTO TBL_Player (username, password, room_num)
-                            VALUES (?, ?, ?)
-                            ''',
-                            (username, hashed_password, 0)  # placeholder for room number
-                        )
-                        conn.commit()
-                        conn.close()
-
-                        success_subtitle.draw()
-                        print(f"Account created successfully: USERNAME: {username}, PASSWORD: {password}")
-                        current_screen = "login"
-                        username_box.clear_input()
-                        password_box.clear_input()
-                        passwordcheck_box.clear_input()
-                    except sqlite3.IntegrityError:
-                        error_message = "Username already exists!"
-                        error_display_end_time = pygame.time.get_ticks() + error_duration
-                        print("Error: Username already exists!")
-            
-
-        # display the error message if still active.
-        current_time = pygame.time.get_ticks()
-        if error_message and current_time < error_display_end_time:
-            error_surf = subtitle_font.render(error_message, True, blue)
-            error_rect = error_surf.get_rect(center=(650, 100))  # adjust position as needed
-            screen.blit(error_surf, error_rect)
-        elif current_time >= error_display_end_time:
-            error_message = ""
-
-        pygame.display.update()
-
-    elif current_screen == "controls":
-        screen.blit(controls1_image, (0, 0))  # draw background image
-        backTOP_button.draw()  # back button to return to main menu
-        switch_button.draw() # switch to alternative controls
 
-        ARROWS_subtitle.draw()
+# CONTROLS SCENE
+# one for arrow keys and one for WASD, the switch button swaps between them
+class ControlsScene(Scene):
+    idle = True
 
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                exit()
+    def __init__(self, background, subtitle, other_scene, other_mode, switch_message):
+        super().__init__()
+        self.background_path = background # loaded when the scene is shown
+        self.background = None
+        self.subtitle = subtitle # "USING ..." message for this scene's controls
+        self.other_scene = other_scene
+        self.other_mode = other_mode
+        self.switch_message = switch_message
 
-            # back button logic
-            if backTOP_button.check_if_clicked(event):
-                current_screen = "main_menu"
+    def next_timer(self):
+        return self.subtitle.time_left()
 
-            if switch_button.check_if_clicked(event):
-                player.control_mode = "wasd"  # switch to wasd controls
-                current_screen = "altcontrols"
-                print("Switched to WASD controls") # debugging
-                ARROWS_subtitle.start_timer()
-                    
+    def enter(self):
+        self.background = assets.acquire(self.background_path)
 
-        pygame.display.update()
+    def exit(self):
+        assets.release(self.background_path)
+        self.background = None
 
-    elif current_screen == "altcontrols":
-        screen.blit(controls2_image, (0, 0))  # draw background image
+    def handle_event(self, event):
+        # back button logic
+        if backTOP_button.check_if_clicked(event):
+            scenes.go_to("main_menu")
+
+        if switch_button.check_if_clicked(event):
+            player.control_mode = self.other_mode  # switch controls
+            scenes.go_to(self.other_scene)
+            print(self.switch_message) # debugging
+            self.subtitle.start_timer()
+
+    def draw(self, alpha):
+        screen.blit(self.background, (0, 0))  # draw background image
         backTOP_button.draw()  # back button to return to main menu
         switch_button.draw() # switch to alternative controls
+        self.subtitle.draw()
 
-        WASD_subtitle.draw()
-
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                exit()
-
-            # back button logic
-            if backTOP_button.check_if_clicked(event):
-                current_screen = "main_menu"
-
-            if switch_button.check_if_clicked(event):
-                player.control_mode = "arrows"  # switch to arrow key controls
-                current_screen = "controls"
-                print("Switched to arrow key controls") # debugging
-                WASD_subtitle.start_timer()
-                    
-        pygame.display.update()
 
-    elif current_screen == "start_game":
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                exit()
+# OVERWORLD SCENE
+class OverworldScene(Scene):
+    def enter(self):
+        overworld_renderer.invalidate() # the screen still has whatever was shown before
 
-        player.update()
+    def update(self, ticks):
+        global previous_room_name, battle_transition_time
+        # game logic, once per fixed tick
+        for _ in range(ticks):
+            player.update()
 
-        # drawing background and sprite
-        current_room.draw()
-        player.draw(screen)
+            if current_room == room2:
+                previous_room_name = [name for name, room in rooms.items() if room == current_room][0]
+                # only check collision if mercy hasn't been shown
+                if not enemy.mercy_shown and enemy.check_collision(player) and not enemy.in_battle:
+                    enemy.in_battle = True
+                    scenes.push("battle")
+                    battle_transition_time = pygame.time.get_ticks()
+                # checks for collision before updating enemy, which moves at double speed until mercy is shown
+                enemy.update(steps=1 if enemy.mercy_shown else 2)
+
+            elif current_room == room3:
+                # broadphase: only enemies sharing a cell with the player get the exact check
+                entity_hash.clear()
+                for room3_enemy in room3_enemies:
+                    if not room3_enemy.mercy_shown and not room3_enemy.in_battle:
+                        entity_hash.insert(room3_enemy, *room3_enemy.collision_box())
+                nearby_enemies = entity_hash.query(*player.collision_box())
+
+                for room3_enemy in room3_enemies:
+                    if room3_enemy in nearby_enemies and room3_enemy.check_collision(player):
+                        room3_enemy.in_battle = True
+                        set_current_battle(Battle(player, room3_enemy))  # start battle with this enemy
+                        scenes.push("battle")
+                        battle_transition_time = pygame.time.get_ticks()
+                    if not room3_enemy.mercy_shown:
+                        room3_enemy.update()
+
+            if scenes.top is not self:
+                break # a battle started, the rest of this frame's ticks belong to it
+
+    def draw(self, alpha):
+        global room1_subtitle_timer
+        # drawing background and sprites, blended between the last two ticks
+        if not DIRTY_RECT_RENDERING:
+            current_room.draw()
+        elif overworld_renderer.needs_full_redraw(current_room):
+            current_room.draw() # new room: draw it all once and keep a copy to restore from
+            overworld_renderer.set_background(current_room)
+        else:
+            overworld_renderer.restore()
+        overworld_renderer.add(player.draw(screen, alpha))
 
         # ensure timer starts when entering the room
         if room1_subtitle_timer is None:
@@ -1553,119 +1861,114 @@ while True:
                 room1_subtitle.draw()  # only display while within the time limit
 
         if current_room == room2:
-            previous_room_name = [name for name, room in rooms.items() if room == current_room][0]
-            # only check collision if mercy hasn't been shown
-            if not enemy.mercy_shown and enemy.check_collision(player) and not enemy.in_battle:
-                enemy.in_battle = True
-                current_screen = "battle"
-                battle_transition_time = pygame.time.get_ticks()
-            # checks for collision before updating enemy
-            if not enemy.mercy_shown:
-                enemy.update()
-                enemy.draw(screen)
-
-            enemy.update()
-            enemy.draw(screen)
+            overworld_renderer.add(enemy.draw(screen, alpha))
 
         elif current_room == room3:
-            for enemy in room3_enemies:
-                if not enemy.mercy_shown and enemy.check_collision(player) and not enemy.in_battle:
-                    enemy.in_battle = True
-                    current_screen = "battle"
-                    battle_transition_time = pygame.time.get_ticks()
-                    current_battle = Battle(player, enemy)  # start battle with this enemy
-                if not enemy.mercy_shown:
-                    enemy.update()
-                    enemy.draw(screen)
+            for room3_enemy in room3_enemies:
+                if not room3_enemy.mercy_shown:
+                    overworld_renderer.add(room3_enemy.draw(screen, alpha))
                 
         # display player level top right
-        level_display = pygame.font.Font('pixelFont.ttf', 30).render(f"LV {player.player_level}", True, white)
-        level_rect = level_display.get_rect(topright=(1280, 10))  # Adjust to fit within 1300px width
-        screen.blit(level_display, level_rect)
-        
+        overworld_renderer.add(overworld_hud.draw(screen))
+
+    def present(self):
+        if DIRTY_RECT_RENDERING:
+            overworld_renderer.present()
+        else:
+            pygame.display.flip()
 
-        pygame.display.flip()
-        clock.tick(60)
 
-    elif current_screen == "battle":
+# BATTLE SCENE
+class BattleScene(Scene):
+    def enter(self):
         # initialise battle if it's the first time
-        if 'current_battle' not in globals():
-            current_battle = Battle(player, enemy)
-        
-        # handle events
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                exit()
-            
-            # handle battle inputs
-            current_battle.handle_input(event)
-        
-        # draw battle window and update logic
-        current_battle.update()
-        current_battle.draw(screen)
+        if current_battle is None:
+            set_current_battle(Battle(player, enemy))
+
+    def handle_event(self, event):
+        # handle battle inputs
+        current_battle.handle_input(event)
+
+    def update(self, ticks):
+        # update logic once per fixed tick
+        for _ in range(ticks):
+            current_battle.update()
+            if current_battle.game_over or scenes.top is not self:
+                break
 
         if current_battle.game_over:
-            current_screen = "game_over"
+            scenes.go_to("game_over")
             # reset player stats for new attempt
             player.x = 600  # starting position
             player.y = 500
             player.current_hp = player.max_hp  # reset health
             enemy.in_battle = False  # reset enemy state
+            current_battle.enemy.in_battle = False # the enemy actually fought, a room3 one in room3
 
-        pygame.display.flip()
-        clock.tick(60)
+    def draw(self, alpha):
+        # draw battle window
+        current_battle.draw(screen, alpha)
 
-    elif current_screen == "game_over":
-        screen.fill((0, 0, 0,))
-        game_over_text.draw()
-        retry_button.draw()
 
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                exit()
-            if retry_button.check_if_clicked(event):
-                current_screen = "start_game"
+# GAME OVER SCENE
+class GameOverScene(Scene):
+    idle = True
 
-                # load checkpoint room
-                saved_room = get_saved_room(current_username)
-                switch_room(saved_room)
+    def handle_event(self, event):
+        if retry_button.check_if_clicked(event):
+            scenes.go_to("start_game")
 
-                # reset player stats
-                player.current_hp = player.max_hp
-                player.x = 600
-                player.y = 500
+            # load checkpoint room
+            saved_room = get_saved_room(current_username)
+            switch_room(saved_room)
 
-                # reset enemy state based on room
-                if saved_room == "room2":
-                    enemy.in_battle = False
-                    enemy.mercy_shown = False
-                    enemy.defeated = False
-                    enemy.x = 500
-                    enemy.y = 300
-
-                elif saved_room == "room3":
-                    for e in room3_enemies:
-                        e.in_battle = False
-                        e.mercy_shown = False
-                        e.defeated = False
-                        e.x = 600
-                        e.y = 450
-
-                enemy.in_battle = False  # reset enemy state
+            # reset player stats
+            player.current_hp = player.max_hp
+            player.x = 600
+            player.y = 500
+
+            # reset enemy state based on room
+            if saved_room == "room2":
+                enemy.in_battle = False
+                enemy.mercy_shown = False
+                enemy.defeated = False
                 enemy.x = 500
                 enemy.y = 300
 
-                # clear any existing battle
-                if 'current_battle' in globals():
-                    del current_battle
-            
-        pygame.display.flip()
-        clock.tick(60)
+            elif saved_room == "room3":
+                for e in room3_enemies:
+                    e.in_battle = False
+                    e.mercy_shown = False
+                    e.defeated = False
+                    e.x = 600
+                    e.y = 450
 
-    pygame.display.flip()
-    clock.tick(60)
+            enemy.in_battle = False  # reset enemy state
+            enemy.x = 500
+            enemy.y = 300
 
-    
- 
\ No newline at end of file
+            # clear any existing battle, freeing whichever enemy it was with
+            if current_battle is not None:
+                current_battle.enemy.in_battle = False
+            set_current_battle(None)
+
+    def draw(self, alpha):
+        screen.fill((0, 0, 0,))
+        game_over_text.draw()
+        retry_button.draw()
+
+
+scenes = SceneManager(clock, game_clock, MAX_FPS)
+scenes.register("main_menu", MainMenuScene())
+scenes.register("login", LoginScene())
+scenes.register("create_account", CreateAccountScene())
+scenes.register("controls", ControlsScene('controls1.png', ARROWS_subtitle, "altcontrols", "wasd",
+                                             "Switched to WASD controls"))
+scenes.register("altcontrols", ControlsScene('controls2.png', WASD_subtitle, "controls", "arrows",
+                                                "Switched to arrow key controls"))
+scenes.register("start_game", OverworldScene())
+scenes.register("battle", BattleScene())
+scenes.register("game_over", GameOverScene())
+scenes.push("main_menu")
+
+scenes.run()
@@ -0,0 +1,242 @@
+import heapq
+import math
+
+from pathfinding import astar_flat
+
+# PATH STRATEGIES
+# different ways of searching the same FlatGrid, picked by name per attack type
+# every strategy returns the waypoints after start (same as astar_flat), or [] if there is no path
+#   astar - plain 4-directional A*, one waypoint per tile
+#   jps   - jump point search, same path lengths as A* but only expands the turning points
+#   theta - Theta*, any-angle paths that cut corners wherever there is line of sight
+
+
+# A* STRATEGY - base class, the others override find_path
+class AStarStrategy:
+    name = "astar"
+
+    def find_path(self, flat_grid, start, goal, max_expansions=None, stats=None):
+        return astar_flat(flat_grid, start, goal, max_expansions, stats)
+
+
+def is_open(flat_grid, x, y):
+    return 0 <= x < flat_grid.width and 0 <= y < flat_grid.height and not flat_grid.cells[y * flat_grid.width + x]
+
+
+# JUMP POINT SEARCH STRATEGY
+# 4-directional version: vertical scans look left and right at every step (like diagonals do in
+# normal JPS) and horizontal scans only stop where a wall above or below them ends
+# segments between jump points are straight, so the bullet flies them in one go
+class JumpPointStrategy(AStarStrategy):
+    name = "jps"
+
+    def jump(self, flat_grid, x, y, dx, dy, goal):
+        # walks from (x, y) in one direction until it finds a jump point, None if it hits a wall
+        while True:
+            x += dx
+            y += dy
+            if not is_open(flat_grid, x, y):
+                return None
+            if (x, y) == goal:
+                return (x, y)
+
+            if dx:
+                # forced neighbour: a wall above/below us just ended, so something opens up there
+                if (is_open(flat_grid, x, y - 1) and not is_open(flat_grid, x - dx, y - 1)) or \
+                   (is_open(flat_grid, x, y + 1) and not is_open(flat_grid, x - dx, y + 1)):
+                    return (x, y)
+            else:
+                if (is_open(flat_grid, x - 1, y) and not is_open(flat_grid, x - 1, y - dy)) or \
+                   (is_open(flat_grid, x + 1, y) and not is_open(flat_grid, x + 1, y - dy)):
+                    return (x, y)
+                # a horizontal scan from here finds something, so this is a turning point
+                if self.jump(flat_grid, x, y, 1, 0, goal) or self.jump(flat_grid, x, y, -1, 0, goal):
+                    return (x, y)
+
+    def directions(self, flat_grid, node, parent):
+        # which ways are worth scanning from node, given how we got there
+        if parent is None:
+            return ((-1, 0), (1, 0), (0, -1), (0, 1))
+
+        x, y = node
+        dx = (x > parent[0]) - (x < parent[0])
+        dy = (y > parent[1]) - (y < parent[1])
+        if dy:
+            # came vertically: keep going and look both ways
+            return ((dx, dy), (-1, 0), (1, 0))
+
+        # came horizontally: keep going, and turn only where a wall above/below has ended
+        directions = [(dx, 0)]
+        for vertical in (-1, 1):
+            if is_open(flat_grid, x, y + vertical) and not is_open(flat_grid, x - dx, y + vertical):
+                directions.append((0, vertical))
+        return directions
+
+    def find_path(self, flat_grid, start, goal, max_expansions=None, stats=None):
+        if not flat_grid.in_bounds(*start) or not is_open(flat_grid, *goal) or start == goal:
+            return []
+
+        def heuristic(node):
+            return abs(node[0] - goal[0]) + abs(node[1] - goal[1])
+
+        open_set = [(heuristic(start), start)]
+        g_score = {start: 0}
+        came_from = {start: None}
+        closed = set()
+        expansions = 0
+
+        while open_set:
+            _, current = heapq.heappop(open_set)
+            if current in closed:
+                continue
+            if current == goal:
+                if stats is not None:
+                    stats["expansions"] = expansions
+                path = []
+                while current != start:
+                    path.append(current)
+                    current = came_from[current]
+                path.reverse()
+                return path
+
+            closed.add(current)
+            expansions += 1
+            if max_expansions is not None and expansions > max_expansions:
+                break
+
+            for dx, dy in self.directions(flat_grid, current, came_from[current]):
+                jump_point = self.jump(flat_grid, current[0], current[1], dx, dy, goal)
+                if jump_point is None or jump_point in closed:
+                    continue
+                tentative_g = g_score[current] + abs(jump_point[0] - current[0]) + abs(jump_point[1] - current[1])
+                if jump_point not in g_score or tentative_g < g_score[jump_point]:
+                    g_score[jump_point] = tentative_g
+                    came_from[jump_point] = current
+                    heapq.heappush(open_set, (tentative_g + heuristic(jump_point), jump_point))
+
+        if stats is not None:
+            stats["expansions"] = expansions
+        return []
+
+
+# LINE OF SIGHT
+# True if a bullet can fly straight between the centres of two tiles without touching a wall
+# results are remembered on the grid itself, so a rebuilt grid starts with an empty cache
+def line_of_sight(flat_grid, a, b):
+    if a > b:
+        a, b = b, a  # same answer both ways, so only store one of them
+    cache = flat_grid.sight_cache
+    key = (a, b)
+    if key in cache:
+        return cache[key]
+
+    x0, y0 = a
+    x1, y1 = b
+    dx = x1 - x0
+    dy = y1 - y0
+    step_x = (dx > 0) - (dx < 0)
+    step_y = (dy > 0) - (dy < 0)
+    dx = abs(dx)
+    dy = abs(dy)
+
+    # walks every tile the centre line passes through; when it goes exactly through a corner
+    # both tiles next to the corner have to be clear
+    clear = is_open(flat_grid, x0, y0)
+    x, y = x0, y0
+    error = dx - dy
+    remaining = dx + dy
+    while clear and remaining > 0:
+        if error > 0:
+            x += step_x
+            error -= 2 * dy
+            remaining -= 1
+        elif error < 0:
+            y += step_y
+            error += 2 * dx
+            remaining -= 1
+        else:
+            if not is_open(flat_grid, x + step_x, y) or not is_open(flat_grid, x, y + step_y):
+                clear = False
+                break
+            x += step_x
+            y += step_y
+            error += 2 * (dx - dy)
+            remaining -= 2
+        clear = is_open(flat_grid, x, y)
+
+    cache[key] = clear
+    return clear
+
+
+# THETA* STRATEGY
+# like A*, but a tile can take its parent's parent as its own parent when there's line of sight,
+# which straightens the path and leaves only the corners as waypoints
+class ThetaStarStrategy(AStarStrategy):
+    name = "theta"
+
+    def find_path(self, flat_grid, start, goal, max_expansions=None, stats=None):
+        if not flat_grid.in_bounds(*start) or not is_open(flat_grid, *goal) or start == goal:
+            return []
+
+        def heuristic(node):
+            return math.hypot(node[0] - goal[0], node[1] - goal[1])
+
+        open_set = [(heuristic(start), start)]
+        g_score = {start: 0}
+        came_from = {start: start}
+        closed = set()
+        expansions = 0
+
+        while open_set:
+            _, current = heapq.heappop(open_set)
+            if current in closed:
+                continue
+            if current == goal:
+                if stats is not None:
+                    stats["expansions"] = expansions
+                path = []
+                while current != start:
+                    path.append(current)
+                    current = came_from[current]
+                path.reverse()
+                return path
+
+            closed.add(current)
+            expansions += 1
+            if max_expansions is not None and expansions > max_expansions:
+                break
+
+            parent = came_from[current]
+            x, y = current
+            for neighbor in ((x - 1, y), (x + 1, y), (x, y - 1), (x, y + 1)):
+                if neighbor in closed or not is_open(flat_grid, *neighbor):
+                    continue
+                if line_of_sight(flat_grid, parent, neighbor):
+                    # skip current and go straight from its parent
+                    source = parent
+                    tentative_g = g_score[parent] + math.hypot(neighbor[0] - parent[0], neighbor[1] - parent[1])
+                else:
+                    source = current
+                    tentative_g = g_score[current] + 1
+                if neighbor not in g_score or tentative_g < g_score[neighbor]:
+                    g_score[neighbor] = tentative_g
+                    came_from[neighbor] = source
+                    heapq.heappush(open_set, (tentative_g + heuristic(neighbor), neighbor))
+
+        if stats is not None:
+            stats["expansions"] = expansions
+        return []
+
+
+PATH_STRATEGIES = {
+    "astar": AStarStrategy(),
+    "jps": JumpPointStrategy(),
+    "theta": ThetaStarStrategy(),
+}
+
+
+def get_path_strategy(name):
+    # looks up a strategy by name, e.g. from Battle.attack_strategies
+    if name not in PATH_STRATEGIES:
+        raise ValueError(f"Unknown path strategy: {name}")
+    return PATH_STRATEGIES[name]
@@ -0,0 +1,94 @@
+import queue
+import threading
+import time
+
+from pathfinding import astar_flat
+
+# PATH WORKERS
+# runs path searches on background threads so spawning a wave never waits for a search
+# the game asks for a path, keeps playing, and checks request.done on later frames
+
+
+# PATH REQUEST CLASS
+# one search handed to the pool; the main thread only reads it, a worker fills in the result
+class PathRequest:
+    def __init__(self, room, start, goal, strategy=None, timeout_ms=500, max_expansions=None):
+        self.room = room
+        self.start = start
+        self.goal = goal
+        self.strategy = strategy
+        self.max_expansions = max_expansions
+        # the grid is grabbed now so the worker never touches the room itself
+        self.flat_grid = room.get_flat_grid()
+        self.grid_version = room.grid_version
+        self.deadline = time.monotonic() + timeout_ms / 1000
+
+        self.path = None
+        self.cancelled = False
+        self.expired = False  # deadline passed before a worker got to it
+        self.done = False     # set last, once path/expired are final
+
+    def cancel(self):
+        # a cancelled request is skipped if no worker has started it yet
+        self.cancelled = True
+
+    def succeeded(self):
+        return self.done and not self.cancelled and not self.expired
+
+    def run(self):
+        if self.cancelled or time.monotonic() > self.deadline:
+            self.expired = not self.cancelled
+            self.done = True
+            return
+
+        if self.strategy is not None:
+            path = self.strategy.find_path(self.flat_grid, self.start, self.goal, self.max_expansions)
+        else:
+            path = astar_flat(self.flat_grid, self.start, self.goal, self.max_expansions)
+        self.path = tuple(path)
+        # finishing after the deadline means nobody is waiting for it any more
+        self.expired = time.monotonic() > self.deadline
+        self.done = True
+
+
+# PATH WORKER POOL CLASS
+# daemon threads so a stuck search can never stop the game from closing
+class PathWorkerPool:
+    def __init__(self, workers=2):
+        self.requests = queue.Queue()
+        self.completed = 0
+        self.expired = 0
+        self.cancelled = 0
+        self.threads = []
+        for number in range(workers):
+            thread = threading.Thread(target=self.work, name=f"path-worker-{number}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def request(self, room, start, goal, strategy=None, timeout_ms=500, max_expansions=None):
+        # queues a search and returns straight away
+        path_request = PathRequest(room, start, goal, strategy, timeout_ms, max_expansions)
+        self.requests.put(path_request)
+        return path_request
+
+    def work(self):
+        while True:
+            path_request = self.requests.get()
+            if path_request is None:
+                break  # shutdown() asked this worker to stop
+            try:
+                path_request.run()
+            except Exception as error:
+                print(f"Path worker failed: {error}")
+                path_request.expired = True
+                path_request.done = True
+            if path_request.cancelled:
+                self.cancelled += 1
+            elif path_request.expired:
+                self.expired += 1
+            else:
+                self.completed += 1
+
+    def shutdown(self):
+        for _ in self.threads:
+            self.requests.put(None)
@@ -0,0 +1,398 @@
+import heapq
+from collections import OrderedDict
+
+from spatial import normalize_rect
+
+# PATHFINDING
+# grid helpers and A* searches used by the battle bullets
+# nothing in here needs pygame so it can be benchmarked on its own
+
+# A* VARIABLES
+TILE_SIZE = 40
+GRID_WIDTH = 1300 // TILE_SIZE
+GRID_HEIGHT = 720 // TILE_SIZE
+
+WALL = 1
+FREE = 0
+
+
+def build_grid(obstacles, width=GRID_WIDTH, height=GRID_HEIGHT, tile_size=TILE_SIZE):
+    # marks every tile that overlaps an obstacle as a wall
+    # same result as testing each tile Rect with colliderect, but only visits tiles under each obstacle
+    grid = [[FREE for _ in range(width)] for _ in range(height)]
+    for obstacle in obstacles:
+        left, top, w, h = normalize_rect(*obstacle)  # negative sizes flip round, like colliderect
+        if w <= 0 or h <= 0:
+            continue  # empty rects never collide
+        first_x = max(0, left // tile_size)
+        last_x = min(width - 1, (left + w - 1) // tile_size)
+        first_y = max(0, top // tile_size)
+        last_y = min(height - 1, (top + h - 1) // tile_size)
+        for y in range(first_y, last_y + 1):
+            row = grid[y]
+            for x in range(first_x, last_x + 1):
+                row[x] = WALL
+    return grid
+
+
+# A* PATHFINDING ALGORITHM
+# original tuple/dict version, kept as the reference the flat engine is checked against
+def astar_pathfinding(grid, start, goal):
+            def heuristic(a, b):
+                return abs(a[0] - b[0]) + abs(a[1] - b[1])
+
+            grid_width = len(grid[0])
+            grid_height = len(grid)
+
+            open_set = []
+            heapq.heappush(open_set, (0, start))
+            came_from = {}
+            g_score = {start: 0}
+            f_score = {start: heuristic(start, goal)}
+
+            while open_set:
+                _, current = heapq.heappop(open_set)
+                if current == goal:
+                    path = []
+                    while current in came_from:
+                        path.append(current)
+                        current = came_from[current]
+                    path.reverse()
+                    return path
+
+                x, y = current
+                for dx, dy in [(-1,0),(1,0),(0,-1),(0,1)]:  # 4-directional
+                    neighbor = (x + dx, y + dy)
+                    if 0 <= neighbor[0] < grid_width and 0 <= neighbor[1] < grid_height:
+                        if grid[neighbor[1]][neighbor[0]] == 1: continue  # skip walls
+                        tentative_g = g_score[current] + 1
+                        if neighbor not in g_score or tentative_g < g_score[neighbor]:
+                            came_from[neighbor] = current
+                            g_score[neighbor] = tentative_g
+                            f_score[neighbor] = tentative_g + heuristic(neighbor, goal)
+                            heapq.heappush(open_set, (f_score[neighbor], neighbor))
+            return []
+
+
+# FLAT GRID CLASS
+# the same grid stored as one bytearray, tile (x, y) lives at index y * width + x
+class FlatGrid:
+    def __init__(self, width, height, cells=None):
+        self.width = width
+        self.height = height
+        self.cells = cells if cells is not None else bytearray(width * height)
+        self.sight_cache = {}  # line of sight results for Theta*, see path_strategies.line_of_sight
+        self.cluster_graphs = {}  # HPA* graphs by cluster size, see hierarchical.get_cluster_graph
+        self.neighbor_lists = None  # shared by D* Lite planners, see dstar_lite.neighbor_lists
+
+    @classmethod
+    def from_rows(cls, grid):
+        # converts a list of rows (like Room.get_grid returns) into a flat grid
+        height = len(grid)
+        width = len(grid[0]) if height else 0
+        cells = bytearray(width * height)
+        for y, row in enumerate(grid):
+            for x, value in enumerate(row):
+                if value == WALL:
+                    cells[y * width + x] = WALL
+        return cls(width, height, cells)
+
+    def in_bounds(self, x, y):
+        return 0 <= x < self.width and 0 <= y < self.height
+
+    def is_wall(self, x, y):
+        return self.cells[y * self.width + x] == WALL
+
+    def index(self, x, y):
+        return y * self.width + x
+
+    def position(self, index):
+        return index % self.width, index // self.width
+
+
+# FLAT A* ENGINE
+# replacement for astar_pathfinding:
+# - g scores and parents live in flat arrays instead of dicts
+# - a closed set stops stale heap entries being expanded again
+# - ties on f are broken on (x, y) exactly like the tuple version, so both return the same path
+# - max_expansions gives up (returns []) after that many nodes, so a hopeless search can't stall a frame
+def astar_flat(flat_grid, start, goal, max_expansions=None, stats=None):
+    width = flat_grid.width
+    height = flat_grid.height
+    cells = flat_grid.cells
+
+    start_x, start_y = start
+    goal_x, goal_y = goal
+    if not (0 <= start_x < width and 0 <= start_y < height):
+        return []
+    if not (0 <= goal_x < width and 0 <= goal_y < height):
+        return []  # tuple version explores everything and then also returns []
+    if start == goal:
+        return []  # tuple version returns an empty path when already there
+
+    size = width * height
+    start_index = start_y * width + start_x
+    goal_index = goal_y * width + goal_x
+
+    g_score = [-1] * size  # -1 means not seen yet
+    came_from = [-1] * size
+    closed = bytearray(size)
+
+    g_score[start_index] = 0
+    # heap entries are (f, tie, index), tie = x * height + y matches comparing (x, y) tuples
+    open_set = [(0, start_x * height + start_y, start_index)]
+    expansions = 0
+
+    while open_set:
+        _, _, current = heapq.heappop(open_set)
+        if closed[current]:
+            continue  # stale entry, already expanded with a better score
+        if current == goal_index:
+            if stats is not None:
+                stats["expansions"] = expansions
+            path = []
+            while current != start_index:
+                path.append((current % width, current // width))
+                current = came_from[current]
+            path.reverse()
+            return path
+
+        closed[current] = 1
+        expansions += 1
+        if max_expansions is not None and expansions > max_expansions:
+            break
+
+        x = current % width
+        y = current // width
+        next_g = g_score[current] + 1
+
+        # same neighbour order as the tuple version: left, right, up, down
+        if x > 0:
+            neighbor = current - 1
+            if not cells[neighbor] and not closed[neighbor]:
+                old_g = g_score[neighbor]
+                if old_g < 0 or next_g < old_g:
+                    g_score[neighbor] = next_g
+                    came_from[neighbor] = current
+                    f = next_g + abs(x - 1 - goal_x) + abs(y - goal_y)
+                    heapq.heappush(open_set, (f, (x - 1) * height + y, neighbor))
+        if x < width - 1:
+            neighbor = current + 1
+            if not cells[neighbor] and not closed[neighbor]:
+                old_g = g_score[neighbor]
+                if old_g < 0 or next_g < old_g:
+                    g_score[neighbor] = next_g
+                    came_from[neighbor] = current
+                    f = next_g + abs(x + 1 - goal_x) + abs(y - goal_y)
+                    heapq.heappush(open_set, (f, (x + 1) * height + y, neighbor))
+        if y > 0:
+            neighbor = current - width
+            if not cells[neighbor] and not closed[neighbor]:
+                old_g = g_score[neighbor]
+                if old_g < 0 or next_g < old_g:
+                    g_score[neighbor] = next_g
+                    came_from[neighbor] = current
+                    f = next_g + abs(x - goal_x) + abs(y - 1 - goal_y)
+                    heapq.heappush(open_set, (f, x * height + y - 1, neighbor))
+        if y < height - 1:
+            neighbor = current + width
+            if not cells[neighbor] and not closed[neighbor]:
+                old_g = g_score[neighbor]
+                if old_g < 0 or next_g < old_g:
+                    g_score[neighbor] = next_g
+                    came_from[neighbor] = current
+                    f = next_g + abs(x - goal_x) + abs(y + 1 - goal_y)
+                    heapq.heappush(open_set, (f, x * height + y + 1, neighbor))
+
+    if stats is not None:
+        stats["expansions"] = expansions
+    return []
+
+
+# PATH CACHE CLASS
+# remembers finished searches so the same (room, start, goal) query isn't searched twice
+# rooms need get_flat_grid() and a grid_version that goes up whenever their obstacles change
+# strategy is anything with a name and find_path (see path_strategies), plain A* if left out
+class PathCache:
+    def __init__(self, max_size=256):
+        self.max_size = max_size
+        self.paths = OrderedDict()  # (room, start, goal) -> (grid_version, path), oldest first
+        self.hits = 0
+        self.misses = 0
+
+    def get_path(self, room, start, goal, max_expansions=None, strategy=None):
+        path = self.lookup(room, start, goal, strategy)
+        if path is not None:
+            return path
+
+        # stored as a tuple so a bullet can't change a path other bullets share
+        if strategy is not None:
+            path = tuple(strategy.find_path(room.get_flat_grid(), start, goal, max_expansions))
+        else:
+            path = tuple(astar_flat(room.get_flat_grid(), start, goal, max_expansions))
+        if max_expansions is not None and not path:
+            return path  # might only have hit the limit, so don't remember it as unreachable
+        self.store(room, start, goal, strategy, room.grid_version, path)
+        return path
+
+    def lookup(self, room, start, goal, strategy=None):
+        # cached path for this query, or None if it hasn't been searched on the current grid
+        key = (room, start, goal, strategy.name if strategy is not None else "astar")
+        entry = self.paths.get(key)
+        if entry is not None and entry[0] == room.grid_version:
+            self.paths.move_to_end(key)  # most recently used
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        return None
+
+    def store(self, room, start, goal, strategy, grid_version, path):
+        # also used for paths that finished on a worker thread (see path_workers)
+        if grid_version != room.grid_version:
+            return  # searched on a grid that has since changed
+        key = (room, start, goal, strategy.name if strategy is not None else "astar")
+        self.paths[key] = (grid_version, tuple(path))
+        self.paths.move_to_end(key)
+        if len(self.paths) > self.max_size:
+            self.paths.popitem(last=False)  # evict least recently used
+
+    def invalidate_room(self, room):
+        # drops every path that was found on this room's old grid
+        for key in [key for key in self.paths if key[0] is room]:
+            del self.paths[key]
+
+    def clear(self):
+        self.paths.clear()
+
+
+# PATH REPLANNER CLASS
+# for a bullet chasing a moving tile: follows a path from the path cache one tile at a time and
+# asks for a new one whenever the goal has changed tile (or the bullet has left the path)
+# same update(start, goal) -> next tile interface as dstar_lite.DStarLite
+class PathReplanner:
+    def __init__(self, path_cache, room, strategy=None):
+        self.path_cache = path_cache
+        self.room = room
+        self.strategy = strategy
+        self.goal = None
+        self.path = ()
+        self.index = 0
+        self.position = None  # tile the last update sent the bullet to
+
+    def update(self, start, goal):
+        # next tile from start towards goal, None once it's there or if it can't be reached
+        if goal != self.goal or start != self.position:
+            self.path = self.path_cache.get_path(self.room, start, goal, strategy=self.strategy)
+            self.goal = goal
+            self.index = 0
+        if self.index >= len(self.path):
+            return None
+        self.position = self.path[self.index]
+        self.index += 1
+        return self.position
+
+
+# FLOW FIELD CLASS
+# BFS distance map out from one target tile (the heart), shared by every homing bullet
+# a bullet just steps to the neighbour that is one tile closer, so 100 bullets cost the same as 1
+# the BFS is resumable: it only spreads as far as the bullets have asked about, and moving the
+# target starts a new spread without reallocating anything
+class FlowField:
+    def __init__(self, flat_grid):
+        self.flat_grid = None
+        self.target = None
+        self.rebuilds = 0
+        self.set_grid(flat_grid)
+
+    def set_grid(self, flat_grid):
+        self.flat_grid = flat_grid
+        size = flat_grid.width * flat_grid.height
+        self.distance = [0] * size
+        self.stamp = [0] * size  # a tile's distance only counts if its stamp matches generation
+        self.generation = 0
+        self.queue = []
+        self.queue_head = 0
+        self.target = None
+
+    def update(self, flat_grid, target):
+        # call once per tick with the heart's tile, only does work when something changed
+        if flat_grid is not self.flat_grid:
+            self.set_grid(flat_grid)
+        if target == self.target:
+            return False
+
+        self.target = target
+        self.generation += 1
+        self.queue = []
+        self.queue_head = 0
+        self.rebuilds += 1
+
+        x, y = target
+        grid = self.flat_grid
+        # walls and off-grid targets give an empty field, like astar_flat finding no path
+        if grid.in_bounds(x, y) and not grid.is_wall(x, y):
+            index = grid.index(x, y)
+            self.distance[index] = 0
+            self.stamp[index] = self.generation
+            self.queue.append(index)
+        return True
+
+    def expand_until(self, index):
+        # carries on the BFS until index has a distance or there is nothing left to reach
+        width = self.flat_grid.width
+        height = self.flat_grid.height
+        cells = self.flat_grid.cells
+        distance = self.distance
+        stamp = self.stamp
+        generation = self.generation
+        queue = self.queue
+
+        while stamp[index] != generation and self.queue_head < len(queue):
+            current = queue[self.queue_head]
+            self.queue_head += 1
+            x = current % width
+            y = current // width
+            next_distance = distance[current] + 1
+            for neighbor, inside in ((current - 1, x > 0), (current + 1, x < width - 1),
+                                     (current - width, y > 0), (current + width, y < height - 1)):
+                if inside and not cells[neighbor] and stamp[neighbor] != generation:
+                    stamp[neighbor] = generation
+                    distance[neighbor] = next_distance
+                    queue.append(neighbor)
+
+    def distance_at(self, tile):
+        # steps from tile to the target, None if it can't get there
+        x, y = tile
+        if self.target is None or not self.flat_grid.in_bounds(x, y):
+            return None
+        grid = self.flat_grid
+        if grid.is_wall(x, y):
+            # a bullet can start inside a wall (A* allows it too) and step straight out of it
+            best = None
+            for dx, dy in ((-1, 0), (1, 0), (0, -1), (0, 1)):
+                nx, ny = x + dx, y + dy
+                if grid.in_bounds(nx, ny) and not grid.is_wall(nx, ny):
+                    neighbor_distance = self.distance_at((nx, ny))
+                    if neighbor_distance is not None and (best is None or neighbor_distance < best):
+                        best = neighbor_distance
+            return None if best is None else best + 1
+
+        index = grid.index(x, y)
+        self.expand_until(index)
+        if self.stamp[index] != self.generation:
+            return None
+        return self.distance[index]
+
+    def next_step(self, tile):
+        # neighbouring tile one step closer to the target, None when already there or unreachable
+        current_distance = self.distance_at(tile)
+        if not current_distance:
+            return None
+        x, y = tile
+        grid = self.flat_grid
+        for dx, dy in ((-1, 0), (1, 0), (0, -1), (0, 1)):  # same order as the A* searches
+            nx, ny = x + dx, y + dy
+            if grid.in_bounds(nx, ny) and not grid.is_wall(nx, ny):
+                if self.distance_at((nx, ny)) == current_distance - 1:
+                    return (nx, ny)
+        return None
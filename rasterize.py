@@ -0,0 +1,90 @@
+# RASTERIZING OBSTACLES WITH NUMPY
+# turns a room's obstacle rects into an occupancy array (one cell per tile) or a pixel collision
+# mask in a single vectorised pass, instead of looping over every tile and every obstacle
+# numpy is optional: if it isn't installed HAS_NUMPY is False and Room sticks to the plain loops
+# Room.check_collision uses spatial.StaticGridIndex instead of CollisionMask, which measured faster
+# per query (benchmarks/bench_collision.py); the mask is kept for pixel-level checks and benchmarks
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    np = None
+    HAS_NUMPY = False
+
+
+def obstacle_arrays(obstacles):
+    # left, top, right, bottom (right/bottom exclusive) of every non-empty obstacle as numpy arrays
+    # negative sizes are flipped round the way pygame does
+    boxes = np.array([tuple(obstacle) for obstacle in obstacles], dtype=np.int64).reshape(-1, 4)
+    boxes = boxes[(boxes[:, 2] != 0) & (boxes[:, 3] != 0)]  # empty rects never collide
+    left = np.minimum(boxes[:, 0], boxes[:, 0] + boxes[:, 2])
+    top = np.minimum(boxes[:, 1], boxes[:, 1] + boxes[:, 3])
+    return left, top, left + np.abs(boxes[:, 2]), top + np.abs(boxes[:, 3])
+
+
+def fill_boxes(height, width, first_x, first_y, last_x, last_y):
+    # marks every cell inside the given boxes (inclusive cell ranges) as True
+    # a 2D difference array: +1/-1 at the box corners, then a running total along both axes
+    keep = (first_x <= last_x) & (first_y <= last_y)
+    first_x, first_y, last_x, last_y = first_x[keep], first_y[keep], last_x[keep], last_y[keep]
+
+    corners = np.zeros((height + 1, width + 1), dtype=np.int32)
+    np.add.at(corners, (first_y, first_x), 1)
+    np.add.at(corners, (first_y, last_x + 1), -1)
+    np.add.at(corners, (last_y + 1, first_x), -1)
+    np.add.at(corners, (last_y + 1, last_x + 1), 1)
+    return corners.cumsum(axis=0).cumsum(axis=1)[:height, :width] > 0
+
+
+def rasterize_tiles(obstacles, width, height, tile_size):
+    # occupancy[y, x] is True where tile (x, y) overlaps an obstacle, same as the colliderect loop
+    if not obstacles:
+        return np.zeros((height, width), dtype=bool)
+    left, top, right, bottom = obstacle_arrays(obstacles)
+    first_x = np.maximum(left // tile_size, 0)
+    first_y = np.maximum(top // tile_size, 0)
+    last_x = np.minimum((right - 1) // tile_size, width - 1)
+    last_y = np.minimum((bottom - 1) // tile_size, height - 1)
+    return fill_boxes(height, width, first_x, first_y, last_x, last_y)
+
+
+# COLLISION MASK CLASS
+# pixel-level version of the obstacles; covers the screen and anything sticking out past it
+class CollisionMask:
+    def __init__(self, obstacles, screen_width, screen_height):
+        self.left = 0
+        self.top = 0
+        right = screen_width
+        bottom = screen_height
+        if obstacles:
+            obstacle_left, obstacle_top, obstacle_right, obstacle_bottom = obstacle_arrays(obstacles)
+            if len(obstacle_left):
+                self.left = min(0, int(obstacle_left.min()))
+                self.top = min(0, int(obstacle_top.min()))
+                right = max(right, int(obstacle_right.max()))
+                bottom = max(bottom, int(obstacle_bottom.max()))
+        self.width = right - self.left
+        self.height = bottom - self.top
+
+        if obstacles and len(obstacle_left):
+            self.pixels = fill_boxes(self.height, self.width,
+                                     obstacle_left - self.left, obstacle_top - self.top,
+                                     obstacle_right - 1 - self.left, obstacle_bottom - 1 - self.top)
+        else:
+            self.pixels = np.zeros((self.height, self.width), dtype=bool)
+
+    def collides(self, x, y, width, height):
+        # True if the rect overlaps any obstacle pixel, same answer as colliderect against each obstacle
+        if width < 0:
+            x, width = x + width, -width
+        if height < 0:
+            y, height = y + height, -height
+        if width <= 0 or height <= 0:
+            return False
+        x0 = max(int(x) - self.left, 0)
+        y0 = max(int(y) - self.top, 0)
+        x1 = min(int(x) + int(width) - self.left, self.width)
+        y1 = min(int(y) + int(height) - self.top, self.height)
+        if x0 >= x1 or y0 >= y1:
+            return False
+        return bool(self.pixels[y0:y1, x0:x1].any())
@@ -0,0 +1,39 @@
+# ROOM LAYOUTS
+# obstacles for each room as (x, y, width, height) in screen pixels
+# kept separate from main.py so tools like the benchmarks can use them without opening a window
+
+ROOM_OBSTACLES = {
+    "room1": [
+        (50, 300, 1300, 100),
+        (10, 300, 20, 400),
+        (1200, 400, 200, 95),
+        (1200, 598, 200, 95),
+        (400, 598, 55, 95),
+        (400, 390, 55, 95),
+        (825, 598, 55, 95),
+        (825, 390, 55, 95),
+        (50, 665, 1300, 100),
+    ],
+    "room2": [
+        (50, 150, 1300, 100),
+        (10, 300, 45, 400),
+        (1200, 450, 200, 150),
+        (1200, 250, 200, 95),
+        (90, 598, 1300, 95),
+        (80, 370, 240, 300),
+    ],
+    "room3": [
+        (0, 200, 1300, 100),   # top wall
+        (0, 550, 1300, 100),   # bottom wall
+        (1260, 470, 70, 200),  # column on right
+    ],
+}
+
+
+# doorways between rooms as (from_room, from_tile, to_room, to_tile) on the pathfinding grid
+# these match the x > 1200 checks in Player.handle_input and the entry points in switch_room
+# (to_tile is the tile under the middle of the player once they arrive)
+ROOM_LINKS = [
+    ("room1", (31, 13), "room2", (2, 7)),
+    ("room2", (31, 9), "room3", (1, 9)),
+]
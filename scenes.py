@@ -0,0 +1,148 @@
+import sys
+
+import pygame
+
+# SCENES
+# each screen of the game (menus, overworld, battle...) is a Scene; the SceneManager keeps a stack of
+# them and runs the one on top each frame
+#   enter()              - it has just become the top scene (pushed, or uncovered by a pop)
+#   exit()               - it has stopped being the top scene
+#   handle_event(event)  - one pygame event
+#   update(ticks)        - run this many fixed game ticks (see game_clock.py)
+#   draw(alpha)          - draw the scene, alpha of the way between the last tick and the next
+#   present()            - show what draw drew, a full flip unless the scene knows better
+# idle scenes (static menus) don't run every frame: the manager sleeps in pygame.event.wait until
+# there is input or the scene's next timer is due, and only redraws when something invalidated it
+
+
+class Scene:
+    idle = False # True for screens that only change on input or timers
+
+    def __init__(self):
+        self.dirty = True # needs drawing
+
+    def invalidate(self):
+        self.dirty = True
+
+    def next_timer(self):
+        # ms until something on screen changes by itself (a message disappearing), None if nothing will
+        return None
+
+    def enter(self):
+        pass
+
+    def exit(self):
+        pass
+
+    def handle_event(self, event):
+        pass
+
+    def update(self, ticks):
+        pass
+
+    def draw(self, alpha):
+        pass
+
+    def present(self):
+        pygame.display.flip()
+
+
+class SceneManager:
+    def __init__(self, clock, game_clock, max_fps, idle_timeout=1000):
+        self.clock = clock
+        self.game_clock = game_clock
+        self.max_fps = max_fps
+        self.idle_timeout = idle_timeout # longest an idle scene sleeps before checking its timers again
+        self.scenes = {} # name -> scene
+        self.stack = []
+        self.changed = False
+
+    def register(self, name, scene):
+        self.scenes[name] = scene
+
+    @property
+    def top(self):
+        return self.stack[-1] if self.stack else None
+
+    def leave_top(self):
+        if self.stack:
+            self.top.exit()
+        self.changed = True
+
+    def arrive(self):
+        self.top.invalidate()
+        self.top.enter()
+
+    def push(self, name):
+        self.leave_top()
+        self.stack.append(self.scenes[name])
+        self.arrive()
+
+    def pop(self):
+        self.leave_top()
+        self.stack.pop()
+        if self.stack:
+            self.arrive()
+
+    def go_to(self, name):
+        # back down to name if it's already on the stack, otherwise name takes the top's place
+        scene = self.scenes[name]
+        self.leave_top()
+        if scene in self.stack:
+            del self.stack[self.stack.index(scene) + 1:]
+        else:
+            if self.stack:
+                self.stack.pop()
+            self.stack.append(scene)
+        self.arrive()
+
+    def reset(self, name):
+        # throws the whole stack away, e.g. once the player has logged in
+        self.leave_top()
+        self.stack = [self.scenes[name]]
+        self.arrive()
+
+    def wait_for_events(self, scene):
+        # sleeps until there's input or the scene's next timer is due
+        timer = scene.next_timer()
+        timeout = self.idle_timeout if timer is None else max(1, min(timer, self.idle_timeout))
+        event = pygame.event.wait(timeout)
+        if event.type == pygame.NOEVENT:
+            if timer is not None and timer <= timeout:
+                scene.invalidate() # a message has just timed out
+            return []
+        return [event] + pygame.event.get()
+
+    def run_frame(self):
+        scene = self.top
+        if self.changed:
+            # don't count time spent in the last scene (or asleep in a menu) towards this one's ticks
+            self.changed = False
+            self.clock.tick()
+            self.game_clock.reset()
+
+        if scene.idle and not scene.dirty:
+            events = self.wait_for_events(scene)
+            ticks = 0
+        else:
+            ticks = self.game_clock.advance(self.clock.tick(self.max_fps))
+            events = pygame.event.get()
+
+        for event in events:
+            if event.type == pygame.QUIT:
+                pygame.quit()
+                sys.exit()
+            if event.type != pygame.MOUSEMOTION:
+                scene.invalidate()
+            scene.handle_event(event)
+
+        if self.top is scene:
+            scene.update(ticks)
+        if self.top is scene and (scene.dirty or not scene.idle):
+            scene.draw(self.game_clock.alpha())
+            scene.dirty = False
+            scene.present()
+
+    def run(self):
+        while True:
+            self.run_frame()
@@ -0,0 +1,102 @@
+# SPATIAL INDEXES
+# bucket things by which grid cell they sit in, so a collision check only looks at the few
+# things near it instead of everything in the room
+
+# rooms with this many obstacles or fewer just use Rect.collidelist
+SMALL_ROOM_OBSTACLES = 16
+
+
+def normalize_rect(x, y, w, h):
+    # pygame treats a negative width or height as the rect reaching left/up from x, y
+    if w < 0:
+        x, w = x + w, -w
+    if h < 0:
+        y, h = y + h, -h
+    return x, y, w, h
+
+
+def rects_overlap(ax, ay, aw, ah, bx, by, bw, bh):
+    # same rule as pygame's colliderect: touching edges don't count, empty rects never hit and
+    # negative sizes are flipped round first
+    if aw < 0 or ah < 0:
+        ax, ay, aw, ah = normalize_rect(ax, ay, aw, ah)
+    if bw < 0 or bh < 0:
+        bx, by, bw, bh = normalize_rect(bx, by, bw, bh)
+    return aw > 0 and ah > 0 and bw > 0 and bh > 0 and \
+        ax < bx + bw and bx < ax + aw and ay < by + bh and by < ay + ah
+
+
+def cells_for(cell_size, x, y, w, h):
+    # every (cell_x, cell_y) a non-empty rect touches
+    for cell_y in range(int(y) // cell_size, (int(y) + int(h) - 1) // cell_size + 1):
+        for cell_x in range(int(x) // cell_size, (int(x) + int(w) - 1) // cell_size + 1):
+            yield (cell_x, cell_y)
+
+
+# STATIC GRID INDEX CLASS
+# uniform grid hash for obstacles that never move, built once per room
+class StaticGridIndex:
+    def __init__(self, rects, cell_size=128):
+        self.cell_size = cell_size
+        self.rects = [normalize_rect(*rect) for rect in rects]
+        self.cells = {}  # (cell_x, cell_y) -> indexes into self.rects
+        for index, (x, y, w, h) in enumerate(self.rects):
+            if w <= 0 or h <= 0:
+                continue
+            for cell in cells_for(cell_size, x, y, w, h):
+                self.cells.setdefault(cell, []).append(index)
+
+    def query(self, x, y, w, h):
+        # indexes of every rect that overlaps the given one
+        found = []
+        seen = set()
+        x, y, w, h = normalize_rect(x, y, w, h)
+        if w <= 0 or h <= 0:
+            return found
+        for cell in cells_for(self.cell_size, x, y, w, h):
+            for index in self.cells.get(cell, ()):
+                if index not in seen:
+                    seen.add(index)
+                    if rects_overlap(x, y, w, h, *self.rects[index]):
+                        found.append(index)
+        return found
+
+    def collides(self, x, y, w, h):
+        # stops at the first hit, which is all movement needs
+        x, y, w, h = normalize_rect(x, y, w, h)
+        if w <= 0 or h <= 0:
+            return False
+        for cell in cells_for(self.cell_size, x, y, w, h):
+            for index in self.cells.get(cell, ()):
+                if rects_overlap(x, y, w, h, *self.rects[index]):
+                    return True
+        return False
+
+
+# SPATIAL HASH CLASS
+# same grid idea for things that move: clear it, insert everything for this tick, then only run
+# the exact collision test on things that ended up in the same cells
+class SpatialHash:
+    def __init__(self, cell_size=128):
+        self.cell_size = cell_size
+        self.cells = {}  # (cell_x, cell_y) -> items inserted there this tick
+
+    def clear(self):
+        self.cells.clear()
+
+    def insert(self, item, x, y, w, h):
+        x, y, w, h = normalize_rect(x, y, w, h)
+        if w <= 0 or h <= 0:
+            return  # can't collide with anything
+        for cell in cells_for(self.cell_size, x, y, w, h):
+            self.cells.setdefault(cell, []).append(item)
+
+    def query(self, x, y, w, h):
+        # everything sharing at least one cell with the rect, each item once
+        nearby = set()
+        x, y, w, h = normalize_rect(x, y, w, h)
+        if w <= 0 or h <= 0:
+            return nearby
+        for cell in cells_for(self.cell_size, x, y, w, h):
+            nearby.update(self.cells.get(cell, ()))
+        return nearby
@@ -0,0 +1,45 @@
+import pygame
+
+# SPRITE ATLAS
+# animation frames are cut out of a sheet and scaled once per (sheet, frame size, scale factor) and
+# then shared by every Player/Enemy using that sheet, instead of each instance scaling its own copies
+# left-facing (flipped) versions are cached the same way
+# frames are handed out as tuples of shared surfaces: blit them, never draw on them
+
+
+class SpriteAtlas:
+    def __init__(self):
+        self.frames = {} # (sheet, frame width, frame height, scale factor, col, row) -> scaled frame
+        self.animations = {} # (sheet, frame width, frame height, scale factor, cells, flipped) -> frames
+
+    def frame(self, sheet, width, height, scale_factor, col, row):
+        key = (sheet, width, height, scale_factor, col, row)
+        frame = self.frames.get(key)
+        if frame is None:
+            sprite = sheet.subsurface(pygame.Rect(col * width, row * height, width, height))
+            frame = pygame.transform.scale(sprite, (int(width * scale_factor), int(height * scale_factor)))
+            self.frames[key] = frame
+        return frame
+
+    def animation(self, sheet, width, height, scale_factor, cells, flipped=False):
+        # frames for the (col, row) cells in order, mirrored left to right if flipped
+        cells = tuple(cells)
+        key = (sheet, width, height, scale_factor, cells, flipped)
+        frames = self.animations.get(key)
+        if frames is None:
+            if flipped:
+                frames = tuple(pygame.transform.flip(frame, True, False)
+                               for frame in self.animation(sheet, width, height, scale_factor, cells))
+            else:
+                frames = tuple(self.frame(sheet, width, height, scale_factor, col, row) for col, row in cells)
+            self.animations[key] = frames
+        return frames
+
+    def size_bytes(self):
+        # memory held by the cached frames
+        surfaces = list(self.frames.values())
+        surfaces += [frame for key, frames in self.animations.items() if key[-1] for frame in frames]
+        return sum(surface.get_bytesize() * surface.get_width() * surface.get_height() for surface in surfaces)
+
+
+sprite_atlas = SpriteAtlas()
@@ -0,0 +1,53 @@
+from collections import OrderedDict
+
+import pygame
+
+# FONTS AND RENDERED TEXT
+# opening a Font reads and parses the whole TTF file, so each (file, size) is only ever opened once
+# and shared; rendered strings are kept in a small LRU cache as most HUD text ("HP", "LV 1", "20/20")
+# is the same frame after frame
+DEFAULT_FONT = 'pixelFont.ttf'
+
+
+class FontRegistry:
+    def __init__(self):
+        self.fonts = {} # (file, size) -> pygame.font.Font
+
+    def get(self, size, file=DEFAULT_FONT):
+        key = (file, size)
+        font = self.fonts.get(key)
+        if font is None:
+            font = pygame.font.Font(file, size)
+            self.fonts[key] = font
+        return font
+
+
+class TextCache:
+    def __init__(self, font_registry, max_size=256):
+        self.font_registry = font_registry
+        self.max_size = max_size
+        self.surfaces = OrderedDict() # (text, size, colour, antialias, file) -> surface, oldest first
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, text, size, color, antialias=True, file=DEFAULT_FONT):
+        # the returned surface is shared, blit it but don't draw on it
+        key = (text, size, tuple(color), antialias, file)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            self.surfaces.move_to_end(key)
+            return surface
+        self.misses += 1
+        surface = self.font_registry.get(size, file).render(text, antialias, color)
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.max_size:
+            self.surfaces.popitem(last=False) # least recently used
+        return surface
+
+    def clear(self):
+        self.surfaces.clear()
+
+
+fonts = FontRegistry()
+text_cache = TextCache(fonts)